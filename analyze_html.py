@@ -1,15 +1,122 @@
+import os
 import re
+import sys
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-with open("debug_page.html", "r", encoding="utf-8") as f:
-    content = f.read()
+from url_files import UrlSink
+from timeline_json import status_url
 
-# Find all occurrences of status links
-matches = re.findall(r'<a[^>]*href="[^"]*/status/[^"]*"[^>]*>', content)
+# Status links as they appear in saved pages and in HAR captures, where JSON
+# escapes every slash as \/. Relative links count as well.
+LINK_RE = re.compile(
+    rb"(?:https?:\\?/\\?/[A-Za-z0-9.-]{1,64})?\\?/(i\\?/web|[A-Za-z0-9_]{1,15})\\?/status(?:es)?\\?/(\d{1,20})"
+)
+# Longer than any match, so a link cut by a chunk or segment boundary is
+# always seen whole on one side of it
+OVERLAP = 256
+CAPTURE_EXTENSIONS = (".html", ".htm", ".har", ".json")
 
-print(f"Found {len(matches)} status links.")
-for i, m in enumerate(matches[:5]):
-    print(f"[{i}] {m}")
+def scan_range(path, start, end, chunk_size=1 << 20):
+    """Returns the (account, status_id) pairs of links starting between byte `start` and `end`.
 
-# Also check for article tags
-articles = re.findall(r'<article', content)
-print(f"Found {len(articles)} article tags.")
+    The file is read in chunks, and reading begins a little before `start`
+    so a link that straddles it is skipped whole instead of half-matched.
+    """
+    found = {}
+    with open(path, "rb") as f:
+        offset = max(0, start - OVERLAP)
+        f.seek(offset)
+        buffer = b""
+        while True:
+            block = f.read(chunk_size)
+            buffer += block
+            # Matches near the end of the buffer may continue in the next block
+            limit = len(buffer) if not block else max(0, len(buffer) - OVERLAP)
+            resume = limit
+            for match in LINK_RE.finditer(buffer):
+                if match.start() >= limit:
+                    break
+                resume = max(limit, match.end())
+                if offset + match.start() < start:
+                    continue
+                if offset + match.start() >= end:
+                    return list(found)
+                account = match.group(1).replace(b"\\", b"").decode("ascii")
+                found[(account, int(match.group(2)))] = None
+            if not block or offset + limit >= end:
+                return list(found)
+            buffer = buffer[resume:]
+            offset += resume
+
+def plan_segments(paths, segment_size):
+    """Splits the files into (path, start, end) byte ranges of at most `segment_size`."""
+    segments = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), segment_size):
+            segments.append((path, start, min(start + segment_size, size)))
+    return segments
+
+def collect_paths(inputs):
+    """Expands directories into the page dumps and HAR files inside them."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths += [os.path.join(root, name) for name in sorted(files)
+                          if name.lower().endswith(CAPTURE_EXTENSIONS)]
+        else:
+            paths.append(item)
+    return paths
+
+def scan_segment(segment):
+    return scan_range(*segment)
+
+def scan_all(segments, workers):
+    """Yields the links of each segment, in order, scanning them in `workers` processes."""
+    if workers > 1 and len(segments) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(scan_segment, segments)
+    else:
+        yield from map(scan_segment, segments)
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract status URLs from saved X pages and HAR captures, without a browser.")
+    parser.add_argument("inputs", nargs="*", default=["debug_page.html"], metavar="path",
+                        help="HTML dumps, HAR files or directories of them (default: debug_page.html)")
+    parser.add_argument("-o", "--output", default="-", help="Output file for the URLs. Use - for stdout (default)")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Parallel worker processes (default: CPU count)")
+    parser.add_argument("--segment-mb", type=int, default=64, help="Large files are split into pieces of this size (default: 64)")
+    args = parser.parse_args()
+
+    if args.output == "-":
+        # Keep stdout for URLs only
+        sys.stdout = sys.stderr
+    paths = [path for path in collect_paths(args.inputs) if os.path.isfile(path)]
+    if not paths:
+        print("[ERROR] No files to analyze.")
+        return
+    segments = plan_segments(paths, args.segment_mb << 20)
+    print(f"[INFO] Scanning {len(paths)} files in {len(segments)} pieces...")
+
+    sink = UrlSink(args.output, flush_every=1000)
+    per_file = dict.fromkeys(paths, 0)
+    try:
+        # Results come back in file order, whichever process finishes first
+        for (path, _, _), links in zip(segments, scan_all(segments, args.workers)):
+            per_file[path] += len(links)
+            for account, status_id in links:
+                sink.write(status_url(account, status_id))
+    finally:
+        sink.close()
+
+    for path, count in per_file.items():
+        print(f"[INFO] {path}: {count} status links")
+    print(f"[SUCCESS] Found {sink.count} unique status URLs.")
+
+if __name__ == "__main__":
+    # Needed for the process pool in a frozen executable
+    multiprocessing.freeze_support()
+    main()
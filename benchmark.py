@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+import scraper
+
+# *.localhost resolves to the loopback address in Chrome, and the name still
+# contains "x.com", so load_netscape_cookies accepts cookies for it.
+BENCH_HOST = "x.com.localhost"
+BENCH_USER = "bench"
+FIRST_STATUS_ID = 1790000000000000000
+
+# A synthetic media grid. Scrolling near the bottom shows a spinner, waits
+# `latency` ms and appends the next batch of cells. With `recycle` set, only
+# that many cells stay in the page and the removed ones are replaced by
+# padding, like X's virtualized grid. At the end of the feed, "stop" simply
+# adds nothing while "spinner" keeps flashing the spinner without new cells.
+PAGE_TEMPLATE = """<!doctype html>
+<html><head><title>Simulated media timeline</title>
+<style>
+ul { margin: 0; padding: 0; }
+li { display: inline-block; width: 32%; height: 150px; list-style: none; }
+</style></head>
+<body><main><ul id="grid"></ul><div id="spinner" role="progressbar" hidden>Loading</div></main>
+<script>
+const cfg = __CONFIG__;
+const grid = document.getElementById('grid');
+const spinner = document.getElementById('spinner');
+const types = ['video', 'gif', 'image'];
+let next = 0;
+let loading = false;
+let removedHeight = 0;
+
+function cell(i) {
+    const type = types[i % types.length];
+    const id = (BigInt(cfg.firstId) - BigInt(i)).toString();
+    const li = document.createElement('li');
+    const a = document.createElement('a');
+    a.href = `/${cfg.user}/status/${id}/${type === 'image' ? 'photo' : 'video'}/1`;
+    const badge = document.createElement('span');
+    badge.textContent = type === 'gif' ? 'GIF' : (type === 'video' ? '0:15' : '');
+    a.appendChild(badge);
+    li.appendChild(a);
+    return li;
+}
+
+function load() {
+    if (loading) return;
+    if (next >= cfg.items && cfg.end === 'stop') return;
+    loading = true;
+    spinner.hidden = false;
+    setTimeout(() => {
+        const end = Math.min(next + cfg.batch, cfg.items);
+        for (; next < end; next++) grid.appendChild(cell(next));
+        if (cfg.recycle) {
+            while (grid.children.length > cfg.recycle) {
+                removedHeight += grid.firstChild.getBoundingClientRect().height / 3;
+                grid.removeChild(grid.firstChild);
+            }
+            grid.style.paddingTop = `${removedHeight}px`;
+        }
+        spinner.hidden = true;
+        loading = false;
+    }, cfg.latency);
+}
+
+window.addEventListener('scroll', () => {
+    if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 300) load();
+});
+load();
+</script></body></html>
+"""
+
+class TimelineHandler(BaseHTTPRequestHandler):
+    config = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0].endswith("/media"):
+            body = PAGE_TEMPLATE.replace("__CONFIG__", json.dumps(self.config)).encode("utf-8")
+        else:
+            body = b"<!doctype html><html><body>Simulated X</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_server(config):
+    """Serves the simulated timeline on a free port. Returns (server, site_url)."""
+    handler = type("ConfiguredTimelineHandler", (TimelineHandler,), {"config": config})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{BENCH_HOST}:{server.server_address[1]}"
+
+class CountingDriver:
+    """Wraps a WebDriver and counts the calls made through it (each one is a chromedriver round-trip)."""
+
+    def __init__(self, driver):
+        self._driver = driver
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._driver, name)
+        if not callable(attr):
+            # Properties such as current_url are round-trips as well
+            self.calls[name] += 1
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls[name] += 1
+            return attr(*args, **kwargs)
+        return counted
+
+class MemorySampler:
+    """Samples the total RSS of the browser processes in the background and keeps the peak."""
+
+    def __init__(self, driver, interval=0.5):
+        self.interval = interval
+        self.peak = None
+        self.stop_event = threading.Event()
+        self.root = None
+        # The cdp backend starts Chrome itself, the selenium one through chromedriver
+        self.browser_pid = getattr(driver, "browser_pid", None)
+        if psutil is not None:
+            self.root = psutil.Process(self.browser_pid or driver.service.process.pid)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def sample(self):
+        total = 0
+        processes = self.root.children(recursive=True)
+        if self.browser_pid:
+            processes.append(self.root)
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def run(self):
+        while not self.stop_event.is_set():
+            rss = self.sample()
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        if self.root is not None:
+            self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+def write_cookie_file(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Netscape HTTP Cookie File\n\n")
+        for i in range(count):
+            f.write(f"{BENCH_HOST}\tFALSE\t/\tFALSE\t0\tbench_cookie_{i}\tvalue_{i}\n")
+
+def run_benchmark(items=500, batch=30, latency=400, recycle=0, end="stop", cookies=20,
+                  headless=True, window_size=(1280, 900), scan_options=None, backend="selenium"):
+    """Runs one scrape against the simulated timeline and returns its measurements."""
+    config = {
+        "user": BENCH_USER,
+        "firstId": str(FIRST_STATUS_ID),
+        "items": items,
+        "batch": batch,
+        "latency": latency,
+        "recycle": recycle,
+        "end": end,
+    }
+    server, site = start_server(config)
+    cookie_path = os.path.join(tempfile.mkdtemp(), "cookies.txt")
+    write_cookie_file(cookie_path, cookies)
+
+    driver = scraper.setup_driver(headless=headless, window_size=window_size, backend=backend)
+    sampler = MemorySampler(driver)
+    sampler.start()
+    counting = CountingDriver(driver)
+    found_times = []
+
+    try:
+        start = time.perf_counter()
+        scraper.load_netscape_cookies(counting, cookie_path)
+        cookie_time = time.perf_counter() - start
+        cookie_calls = sum(counting.calls.values())
+        counting.calls.clear()
+
+        start = time.perf_counter()
+        urls = scraper.get_video_urls(
+            counting, BENCH_USER, site=site,
+            on_url=lambda url, media_type: found_times.append(time.perf_counter()),
+            **(scan_options or {}),
+        )
+        wall_time = time.perf_counter() - start
+    finally:
+        sampler.stop()
+        driver.quit()
+        server.shutdown()
+
+    return {
+        "backend": backend,
+        "items": items,
+        "urls_found": len(urls),
+        "completeness": len(urls) / items if items else 1.0,
+        "wall_time_s": wall_time,
+        "urls_per_s": len(urls) / wall_time if wall_time else 0.0,
+        "time_to_first_url_s": found_times[0] - start if found_times else None,
+        "scrolls": counting.calls["execute_async_script"],
+        "driver_calls": sum(counting.calls.values()),
+        "driver_calls_by_method": dict(counting.calls),
+        "cookie_load_s": cookie_time,
+        "cookie_driver_calls": cookie_calls,
+        "peak_chrome_rss_mb": sampler.peak / 1024 / 1024 if sampler.peak is not None else None,
+    }
+
+def print_report(result, baseline=None):
+    for key, value in result.items():
+        if isinstance(value, dict):
+            value = ", ".join(f"{k}={v}" for k, v in sorted(value.items()))
+        elif isinstance(value, float):
+            value = f"{value:.3f}"
+        elif value is None:
+            value = "n/a"
+        line = f"  {key:<24} {value}"
+        old = (baseline or {}).get(key)
+        if isinstance(old, (int, float)) and isinstance(result[key], (int, float)) and old:
+            line += f"  (baseline {old:.3f}, {(result[key] - old) / old * 100:+.1f}%)"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against a local simulated media timeline.")
+    parser.add_argument("--items", type=int, default=500, help="Posts in the simulated timeline (default: 500)")
+    parser.add_argument("--batch", type=int, default=30, help="Posts added per load (default: 30)")
+    parser.add_argument("--latency", type=int, default=400, help="Milliseconds each load takes (default: 400)")
+    parser.add_argument("--recycle", type=int, default=0, help="Keep only this many cells in the page, 0 to keep all (default: 0)")
+    parser.add_argument("--end", choices=["stop", "spinner"], default="stop", help="Behavior at the end of the feed (default: stop)")
+    parser.add_argument("--cookies", type=int, default=20, help="Cookies in the synthetic cookie file (default: 20)")
+    parser.add_argument("--backend", choices=["selenium", "cdp"], default="selenium", help="Browser backend to benchmark (default: selenium)")
+    parser.add_argument("--show", action="store_true", help="Show the browser window instead of running headless")
+    parser.add_argument("--min-wait", type=float, default=0.3, help="Passed to get_video_urls (default: 0.3)")
+    parser.add_argument("--max-wait", type=float, default=4.0, help="Passed to get_video_urls (default: 4.0)")
+    parser.add_argument("--max-retries", type=int, default=3, help="Passed to get_video_urls (default: 3)")
+    parser.add_argument("--prune", action="store_true", help="Release harvested cells while scrolling (see scraper.py --prune)")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    # Keep the scraper's own log lines out of the report
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        result = run_benchmark(
+            items=args.items,
+            batch=args.batch,
+            latency=args.latency,
+            recycle=args.recycle,
+            end=args.end,
+            cookies=args.cookies,
+            headless=not args.show,
+            backend=args.backend,
+            scan_options=dict(min_wait=args.min_wait, max_wait=args.max_wait, max_retries=args.max_retries,
+                              prune=args.prune),
+        )
+    finally:
+        sys.stdout = stdout
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print("Benchmark results:")
+    print_report(result, baseline)
+    if psutil is None:
+        print("  (install psutil to measure Chrome memory)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
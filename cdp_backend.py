@@ -0,0 +1,388 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import subprocess
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (
+    JavascriptException, NoSuchElementException, TimeoutException, WebDriverException,
+)
+
+CHROME_CANDIDATES = [
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+# The events NetworkCapture reads from the performance log
+CAPTURED_EVENTS = ("Network.responseReceived", "Network.loadingFinished")
+
+class CDPError(WebDriverException):
+    pass
+
+def find_chrome():
+    """Returns the path of the Chrome executable, or of $CHROME_PATH if set."""
+    for candidate in [os.environ.get("CHROME_PATH")] + CHROME_CANDIDATES:
+        if not candidate:
+            continue
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            return path
+    raise FileNotFoundError("Chrome not found. Set CHROME_PATH to its executable.")
+
+class CDPConnection:
+    """A DevTools websocket. Replies are matched to commands by ID and events go to listeners."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.next_id = 0
+        # command ID -> future of its result
+        self.pending = {}
+        # (event method, session ID) -> callbacks
+        self.listeners = {}
+        self.reader = asyncio.get_running_loop().create_task(self.read())
+
+    @classmethod
+    async def open(cls, url):
+        # Responses such as page HTML can be large, so no size limit
+        ws = await websockets.connect(url, max_size=None, ping_interval=None)
+        return cls(ws)
+
+    async def send(self, method, params=None, session_id=None):
+        self.next_id += 1
+        message = {"id": self.next_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        await self.ws.send(json.dumps(message))
+        return await future
+
+    def on(self, method, session_id, callback):
+        self.listeners.setdefault((method, session_id), []).append(callback)
+
+    def off(self, method, session_id, callback):
+        callbacks = self.listeners.get((method, session_id), [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    async def read(self):
+        try:
+            async for raw in self.ws:
+                message = json.loads(raw)
+                if "id" in message:
+                    future = self.pending.pop(message["id"], None)
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        future.set_exception(CDPError(message["error"].get("message", str(message["error"]))))
+                    else:
+                        future.set_result(message.get("result", {}))
+                    continue
+                key = (message.get("method"), message.get("sessionId"))
+                for callback in list(self.listeners.get(key, ())):
+                    callback(message.get("params", {}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(CDPError("The DevTools connection was closed."))
+            self.pending.clear()
+
+    async def close(self):
+        await self.ws.close()
+        await self.reader
+
+class CDPTab:
+    """A page target, attached through its own session on the browser's connection."""
+
+    def __init__(self, connection, target_id, session_id, context_id=None):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+        # Browser context of an isolated tab, with cookies of its own
+        self.context_id = context_id
+        # Buffered network events in the performance log format, if capturing
+        self.log = None
+
+    async def send(self, method, params=None):
+        return await self.connection.send(method, params, self.session_id)
+
+    def on(self, method, callback):
+        self.connection.on(method, self.session_id, callback)
+
+    def capture_network(self):
+        """Buffers network events as they arrive, instead of Chrome's performance log being polled."""
+        self.log = []
+        for method in CAPTURED_EVENTS:
+            self.on(method, lambda params, method=method: self.log.append(
+                {"message": json.dumps({"message": {"method": method, "params": params}})}
+            ))
+
+    async def drain_log(self):
+        if self.log is None:
+            return []
+        entries, self.log = self.log, []
+        return entries
+
+    async def navigate(self, url, timeout=60):
+        """Loads a page and waits for its load event, like WebDriver's get()."""
+        loaded = asyncio.get_running_loop().create_future()
+
+        def on_load(params):
+            if not loaded.done():
+                loaded.set_result(True)
+        self.on("Page.loadEventFired", on_load)
+        try:
+            result = await self.send("Page.navigate", {"url": url})
+            if result.get("errorText"):
+                raise CDPError(f"Could not load {url}: {result['errorText']}")
+            await asyncio.wait_for(loaded, timeout)
+        finally:
+            self.connection.off("Page.loadEventFired", self.session_id, on_load)
+
+    async def evaluate(self, expression, await_promise=False, timeout=None):
+        request = self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": await_promise,
+        })
+        result = await asyncio.wait_for(request, timeout) if timeout else await request
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise JavascriptException(details.get("exception", {}).get("description") or details.get("text"))
+        return result["result"].get("value")
+
+    async def call(self, script, args=(), is_async=False, timeout=None):
+        """Runs a WebDriver-style script body, which reads `arguments` and uses `return`.
+
+        Async scripts get a callback as their last argument, as with
+        execute_async_script.
+        """
+        function = f"function() {{\n{script}\n}}"
+        arguments = json.dumps(list(args))
+        if is_async:
+            expression = f"new Promise((resolve) => ({function}).apply(null, {arguments}.concat([resolve])))"
+        else:
+            expression = f"({function}).apply(null, {arguments})"
+        return await self.evaluate(expression, await_promise=is_async, timeout=timeout)
+
+class CDPBrowser:
+    """A Chrome process driven over its DevTools websocket.
+
+    All tabs share the one connection, so a single asyncio loop can drive
+    many of them at once, e.g. with asyncio.gather.
+    """
+
+    def __init__(self, process, connection, temp_dir=None):
+        self.process = process
+        self.connection = connection
+        self.temp_dir = temp_dir
+
+    @classmethod
+    async def launch(cls, arguments=(), profile_dir=None, chrome_path=None, timeout=30):
+        if websockets is None:
+            raise ImportError("The cdp backend needs the websockets package: pip install websockets")
+        temp_dir = None
+        if profile_dir:
+            user_data_dir = os.path.abspath(profile_dir)
+            os.makedirs(user_data_dir, exist_ok=True)
+        else:
+            user_data_dir = temp_dir = tempfile.mkdtemp(prefix="xvs-chrome-")
+        # Chrome writes the port it picked and the browser's websocket path here
+        port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+        if os.path.exists(port_file):
+            os.remove(port_file)
+
+        process = subprocess.Popen(
+            [chrome_path or find_chrome(), "--remote-debugging-port=0", f"--user-data-dir={user_data_dir}",
+             "--no-first-run", "--no-default-browser-check", *arguments, "about:blank"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                if os.path.exists(port_file):
+                    with open(port_file, "r", encoding="utf-8") as f:
+                        lines = f.read().split()
+                    if len(lines) >= 2:
+                        break
+                if process.poll() is not None:
+                    raise WebDriverException(f"Chrome exited during startup (code {process.returncode}).")
+                if time.monotonic() > deadline:
+                    raise TimeoutException("Chrome did not open its DevTools port.")
+                await asyncio.sleep(0.05)
+
+            connection = await CDPConnection.open(f"ws://127.0.0.1:{lines[0]}{lines[1]}")
+        except BaseException:
+            process.kill()
+            process.wait()
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+        return cls(process, connection, temp_dir)
+
+    async def new_tab(self, capture_network=False, blocked_urls=None, isolated=False):
+        """Opens a tab (reusing the blank one Chrome starts with) and attaches to it.
+
+        An `isolated` tab gets a browser context of its own, like an incognito
+        window, so tabs logged in with different cookies do not mix.
+        """
+        context_id = None
+        if isolated:
+            context = await self.connection.send("Target.createBrowserContext", {"disposeOnDetach": True})
+            context_id = context["browserContextId"]
+            created = await self.connection.send(
+                "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+            )
+            target_id = created["targetId"]
+        else:
+            targets = await self.connection.send("Target.getTargets")
+            blank = [t for t in targets["targetInfos"]
+                     if t["type"] == "page" and t["url"] == "about:blank" and not t.get("attached")]
+            if blank:
+                target_id = blank[0]["targetId"]
+            else:
+                target_id = (await self.connection.send("Target.createTarget", {"url": "about:blank"}))["targetId"]
+        attached = await self.connection.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        tab = CDPTab(self.connection, target_id, attached["sessionId"], context_id)
+        await tab.send("Page.enable")
+        if capture_network or blocked_urls:
+            await tab.send("Network.enable")
+        if blocked_urls:
+            await tab.send("Network.setBlockedURLs", {"urls": blocked_urls})
+        if capture_network:
+            tab.capture_network()
+        return tab
+
+    async def close_tab(self, tab):
+        await self.connection.send("Target.closeTarget", {"targetId": tab.target_id})
+        if tab.context_id:
+            await self.connection.send("Target.disposeBrowserContext", {"browserContextId": tab.context_id})
+
+    async def close(self):
+        try:
+            await asyncio.wait_for(self.connection.send("Browser.close"), 5)
+        except Exception:
+            pass
+        try:
+            await self.connection.close()
+        finally:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self.process.wait, 5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            if self.temp_dir:
+                shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+class CDPDriver:
+    """Blocking, WebDriver-shaped wrapper around a CDPTab.
+
+    Offers the calls get_video_urls and the cookie helpers make (get,
+    execute_script, execute_async_script, execute_cdp_cmd, find_element,
+    get_log, current_url, quit), so they run on either backend unchanged.
+    The asyncio loop runs in a background thread.
+    """
+
+    def __init__(self, browser, tab, loop, owns_browser=True):
+        self.browser = browser
+        self.tab = tab
+        self.loop = loop
+        self.owns_browser = owns_browser
+        self.script_timeout = 30
+
+    @classmethod
+    def launch(cls, arguments=(), profile_dir=None, capture_network=False, blocked_urls=None, chrome_path=None):
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        browser = None
+        try:
+            browser = asyncio.run_coroutine_threadsafe(
+                CDPBrowser.launch(arguments, profile_dir=profile_dir, chrome_path=chrome_path), loop
+            ).result()
+            tab = asyncio.run_coroutine_threadsafe(browser.new_tab(capture_network, blocked_urls), loop).result()
+        except BaseException:
+            if browser is not None:
+                # Do not leave Chrome and its temporary profile behind
+                try:
+                    asyncio.run_coroutine_threadsafe(browser.close(), loop).result()
+                except Exception:
+                    pass
+            loop.call_soon_threadsafe(loop.stop)
+            raise
+        return cls(browser, tab, loop)
+
+    def _run(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except (asyncio.TimeoutError, TimeoutError):
+            raise TimeoutException("The DevTools call timed out.")
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+
+    def new_tab(self, capture_network=False, blocked_urls=None, isolated=True):
+        """Opens another tab in the same browser, with cookies of its own unless `isolated` is False.
+
+        The returned driver can be used from another thread; the calls of all
+        tabs run concurrently on the one asyncio loop. Its quit() only closes
+        the tab.
+        """
+        tab = self._run(self.browser.new_tab(capture_network, blocked_urls, isolated))
+        return CDPDriver(self.browser, tab, self.loop, owns_browser=False)
+
+    @property
+    def browser_pid(self):
+        return self.browser.process.pid
+
+    @property
+    def current_url(self):
+        return self._run(self.tab.evaluate("location.href"))
+
+    def get(self, url):
+        self._run(self.tab.navigate(url))
+
+    def set_script_timeout(self, seconds):
+        self.script_timeout = seconds
+
+    def execute_script(self, script, *args):
+        return self._run(self.tab.call(script, args))
+
+    def execute_async_script(self, script, *args):
+        return self._run(self.tab.call(script, args, is_async=True, timeout=self.script_timeout))
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self._run(self.tab.send(cmd, cmd_args))
+
+    def find_element(self, by=By.CSS_SELECTOR, value=None):
+        if by != By.CSS_SELECTOR:
+            raise WebDriverException("The cdp backend only supports CSS selectors.")
+        if not self._run(self.tab.evaluate(f"!!document.querySelector({json.dumps(value)})")):
+            raise NoSuchElementException(f"No element matches {value}")
+        return True
+
+    def get_log(self, log_type):
+        if log_type != "performance":
+            return []
+        return self._run(self.tab.drain_log())
+
+    def quit(self):
+        if not self.owns_browser:
+            self._run(self.browser.close_tab(self.tab))
+            return
+        try:
+            self._run(self.browser.close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
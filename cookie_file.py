@@ -0,0 +1,31 @@
+def parse_netscape_cookies(filepath):
+    """Parses the X/Twitter cookies from a Netscape HTTP Cookie File (cookies.txt).
+
+    Returns a list of cookie dicts in the shape Selenium's add_cookie expects.
+    """
+    cookies = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            
+            parts = line.strip().split('\t')
+            if len(parts) >= 7:
+                domain = parts[0]
+                # Selenium strictly matches domains. Ensure it matches x.com or .x.com or twitter.com
+                # We will filter for relevant domains to avoid putting garbage
+                if "x.com" not in domain and "twitter.com" not in domain:
+                    continue
+
+                cookie = {
+                    'domain': domain,
+                    'name': parts[5],
+                    'value': parts[6],
+                    'path': parts[2],
+                    'secure': parts[3].lower() == 'true'
+                }
+                # Handle expiration if present
+                if parts[4] and parts[4] != "0":
+                     cookie['expiry'] = int(parts[4])
+                cookies.append(cookie)
+    return cookies
@@ -6,6 +6,8 @@ import shutil
 import tempfile
 import argparse
 import glob
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Try imports for Chrome/Edge decryption
@@ -57,117 +59,195 @@ def decrypt_data(data, key):
         except:
             return ""
 
-def extract_chromium_cookies(browser_name, user_data_path, output_file="cookies.txt"):
-    """Extracts cookies from Chromium-based browsers (Chrome/Edge)."""
-    
-    # Paths usually:
-    # Chrome: User Data/Default/Network/Cookies
-    # Edge: User Data/Default/Network/Cookies
-    # Note: Modern versions keep cookies in "Network/Cookies", older in just "Cookies"
+def query_cookie_db(db_path, query, params=()):
+    """Runs a query against a browser's cookie database without copying it.
+
+    The database is opened read-only in place. If the browser holds a lock,
+    it is opened as immutable, and only if the file cannot be opened at all
+    is it copied to a temp file like before.
+    """
+    uri = pathlib.Path(db_path).resolve().as_uri()
+    for mode in ("mode=ro", "mode=ro&immutable=1"):
+        try:
+            conn = sqlite3.connect(f"{uri}?{mode}", uri=True)
+            try:
+                return conn.execute(query, params).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.OperationalError as e:
+            # Anything but a lock (e.g. a schema mismatch) will not go away by retrying
+            if "locked" not in str(e) and "unable to open" not in str(e):
+                raise
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_db = os.path.join(tmp_dir, "Cookies.db")
+        shutil.copyfile(db_path, tmp_db)
+        conn = sqlite3.connect(tmp_db)
+        try:
+            return conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+def source_mtimes(paths):
+    """Returns {path: mtime} for the given files and their SQLite WAL files."""
+    mtimes = {}
+    for path in paths:
+        for p in (path, path + "-wal"):
+            if os.path.exists(p):
+                mtimes[p] = os.path.getmtime(p)
+    return mtimes
+
+def jar_is_current(output_file, sources):
+    """Checks whether output_file was extracted from exactly these unchanged source files."""
+    if not os.path.exists(output_file):
+        return False
+    try:
+        with open(output_file + ".sources.json", "r", encoding="utf-8") as f:
+            return json.load(f) == sources
+    except (OSError, ValueError):
+        return False
+
+def save_jar_sources(output_file, sources):
+    with open(output_file + ".sources.json", "w", encoding="utf-8") as f:
+        json.dump(sources, f)
+
+def pick_logged_in_profile(results):
+    """Picks the profile whose X session is most recent.
+
+    `results` maps a cookie database path to its cookie rows
+    (host, path, is_secure, expiry_unix, name, value). Cookies of different
+    profiles are never mixed, as they may belong to different accounts.
+    """
+    def score(item):
+        db_path, rows = item
+        auth_expiry = max((row[3] for row in rows if row[4] == "auth_token"), default=-1)
+        return (auth_expiry >= 0, auth_expiry, os.path.getmtime(db_path))
+
+    candidates = [item for item in results.items() if item[1]]
+    if not candidates:
+        return None, []
+    return max(candidates, key=score)
+
+def write_netscape_file(output_file, rows, generator="This is a generated file!  Do not edit."):
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        f.write(f"# {generator}\n\n")
+        
+        for host, path, is_secure, expiry, name, value in rows:
+            flag = "TRUE" if host.startswith('.') else "FALSE"
+            secure = "TRUE" if is_secure else "FALSE"
+            f.write(f"{host}\t{flag}\t{path}\t{secure}\t{expiry}\t{name}\t{value}\n")
+
+def find_chromium_cookie_dbs(user_data_path):
+    """Returns the cookie database of every Chromium profile (Default and Profile X)."""
+    # Modern versions keep cookies in "Network/Cookies", older in just "Cookies"
+    profiles = [os.path.join(user_data_path, "Default")]
+    profiles += glob.glob(os.path.join(user_data_path, "Profile *"))
+    dbs = []
+    for profile in profiles:
+        for p in (os.path.join(profile, "Network", "Cookies"), os.path.join(profile, "Cookies")):
+            if os.path.exists(p):
+                dbs.append(p)
+                break
+    return dbs
+
+def read_chromium_cookies(cookie_db, key):
+    """Reads and decrypts the X cookies of one Chromium profile."""
+    query = "SELECT host_key, name, value, path, is_secure, expires_utc, encrypted_value FROM cookies WHERE host_key LIKE '%x.com' OR host_key LIKE '%twitter.com'"
+    rows = []
+    for host_key, name, value, path, is_secure, expires_utc, encrypted_value in query_cookie_db(cookie_db, query):
+        if not value:
+            decrypted_value = decrypt_data(encrypted_value, key)
+        else:
+            decrypted_value = value
+        
+        # Convert timestamp
+        # expires_utc is microseconds since 1601
+        # Netscape format needs seconds since 1970 (Unix)
+        # 11644473600 seconds difference
+        expire_unix = 0
+        if expires_utc > 0:
+             expire_seconds = expires_utc / 1000000
+             expire_unix = int(expire_seconds - 11644473600)
+             if expire_unix < 0: expire_unix = 0
+
+        rows.append((host_key, path, is_secure, expire_unix, name, decrypted_value))
+    return rows
+
+def read_profiles(dbs, reader):
+    """Reads all profiles concurrently. Returns {db_path: rows}, leaving out unreadable ones."""
+    def read(db_path):
+        try:
+            return db_path, reader(db_path)
+        except PermissionError:
+            print(f"[WARN] Could not read {db_path}. The browser may need to be closed.")
+        except sqlite3.OperationalError as e:
+            # Schema might differ
+            print(f"[WARN] Could not read {db_path}: {e}")
+        return db_path, None
+
+    with ThreadPoolExecutor(max_workers=max(1, len(dbs))) as pool:
+        return {db_path: rows for db_path, rows in pool.map(read, dbs) if rows is not None}
+
+def extract_chromium_cookies(browser_name, user_data_path, output_file="cookies.txt", force=False):
+    """Extracts cookies from Chromium-based browsers (Chrome/Edge).
+
+    All profiles are read concurrently and the one with the most recent X
+    session is used. If neither the profiles nor the key changed since the
+    last extraction, the existing output file is kept.
+    """
     
     # Find Local State file
     local_state_path = os.path.join(user_data_path, "Local State")
     if not os.path.exists(local_state_path):
         print(f"[ERROR] Could not find {browser_name} Local State file.")
         return False
-    
-    key = get_encryption_key(local_state_path)
-    if not key:
-        print(f"[ERROR] Failed to retrieve encryption key for {browser_name}.")
-        return False
 
-    # Find Cookies DB
-    # Search in Default and Profile X
-    possible_paths = [
-        os.path.join(user_data_path, "Default", "Network", "Cookies"),
-        os.path.join(user_data_path, "Default", "Cookies"),
-    ]
-    # Scan for other profiles
-    profiles = glob.glob(os.path.join(user_data_path, "Profile *"))
-    for p in profiles:
-        possible_paths.append(os.path.join(p, "Network", "Cookies"))
-        possible_paths.append(os.path.join(p, "Cookies"))
-
-    cookie_db = None
-    for p in possible_paths:
-        if os.path.exists(p):
-            cookie_db = p
-            break
-            
-    if not cookie_db:
+    # Find Cookies DBs
+    dbs = find_chromium_cookie_dbs(user_data_path)
+    if not dbs:
         print(f"[ERROR] Could not find {browser_name} cookies database.")
         print(f"Searched in: {user_data_path}")
         return False
 
-    print(f"[INFO] Reading cookies from: {cookie_db}")
+    sources = source_mtimes([local_state_path] + dbs)
+    if not force and jar_is_current(output_file, sources):
+        print(f"[INFO] {browser_name} cookies unchanged since the last extraction. Keeping {output_file}.")
+        return True
 
-    # Copy extraction logic
-    filename = os.path.join(tempfile.gettempdir(), f"{browser_name}_Cookies.db")
-    try:
-        shutil.copyfile(cookie_db, filename)
-    except PermissionError:
-        print(f"[ERROR] Could not read cookie DB. Please CLOSE {browser_name} and try again.")
+    key = get_encryption_key(local_state_path)
+    if not key:
+        print(f"[ERROR] Failed to retrieve encryption key for {browser_name}.")
         return False
 
-    db = sqlite3.connect(filename)
-    cursor = db.cursor()
-    
-    query = "SELECT host_key, name, value, path, is_secure, expires_utc, encrypted_value FROM cookies WHERE host_key LIKE '%x.com' OR host_key LIKE '%twitter.com'"
-    
-    try:
-        cursor.execute(query)
-    except sqlite3.OperationalError:
-        # Schema might differ
-        print("[ERROR] Database schema mismatch. This script supports standard Chrome/Edge schemas.")
+    print(f"[INFO] Reading cookies from {len(dbs)} {browser_name} profile(s)...")
+    results = read_profiles(dbs, lambda db_path: read_chromium_cookies(db_path, key))
+    if not results:
+        print(f"[ERROR] Could not read any cookie DB. Please CLOSE {browser_name} and try again.")
         return False
 
-    cookies_found = 0
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("# Netscape HTTP Cookie File\n")
-        f.write("# This is a generated file!  Do not edit.\n\n")
-        
-        for host_key, name, value, path, is_secure, expires_utc, encrypted_value in cursor.fetchall():
-            if not value:
-                decrypted_value = decrypt_data(encrypted_value, key)
-            else:
-                decrypted_value = value
-            
-            # Convert timestamp
-            # expires_utc is microseconds since 1601
-            # Netscape format needs seconds since 1970 (Unix)
-            # 11644473600 seconds difference
-            expire_unix = 0
-            if expires_utc > 0:
-                 expire_seconds = expires_utc / 1000000
-                 expire_unix = int(expire_seconds - 11644473600)
-                 if expire_unix < 0: expire_unix = 0
-
-            flag = "TRUE" if host_key.startswith('.') else "FALSE"
-            secure = "TRUE" if is_secure else "FALSE"
-            
-            f.write(f"{host_key}\t{flag}\t{path}\t{secure}\t{expire_unix}\t{name}\t{decrypted_value}\n")
-            cookies_found += 1
-
-    db.close()
-    try:
-        os.remove(filename)
-    except:
-        pass
-
-    if cookies_found > 0:
-        print(f"[SUCCESS] Extracted {cookies_found} cookies from {browser_name}.")
-        return True
-    else:
+    cookie_db, rows = pick_logged_in_profile(results)
+    if not rows:
         print(f"[WARN] No X.com cookies found in {browser_name}.")
         return False
 
+    print(f"[INFO] Using cookies from: {cookie_db}")
+    write_netscape_file(output_file, rows)
+    save_jar_sources(output_file, sources)
+    print(f"[SUCCESS] Extracted {len(rows)} cookies from {browser_name}.")
+    return True
+
 def find_all_firefox_cookie_dbs(appdata):
     base_path = os.path.join(appdata, 'Mozilla', 'Firefox', 'Profiles')
     if not os.path.exists(base_path):
         return []
     return glob.glob(os.path.join(base_path, "*", "cookies.sqlite"))
 
-def extract_firefox_cookies(output_file="cookies.txt"):
+def read_firefox_cookies(db_path):
+    query = "SELECT host, path, isSecure, expiry, name, value FROM moz_cookies WHERE host LIKE '%x.com' OR host LIKE '%twitter.com'"
+    return query_cookie_db(db_path, query)
+
+def extract_firefox_cookies(output_file="cookies.txt", force=False):
     appdata = os.getenv('APPDATA')
     if not appdata:
         print("[ERROR] Cannot find APPDATA.")
@@ -179,49 +259,51 @@ def extract_firefox_cookies(output_file="cookies.txt"):
         return False
 
     print(f"[INFO] Found {len(dbs)} Firefox profiles.")
-    
-    total_cookies = 0
-    # We will append to file, but we should start fresh first
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("# Netscape HTTP Cookie File\n")
-        f.write("# Generated from Firefox\n\n")
-
-    for db_path in dbs:
-        with tempfile.NamedTemporaryFile(delete=False) as tmp:
-            tmp_db = tmp.name
-        
-        try:
-            shutil.copy2(db_path, tmp_db)
-            conn = sqlite3.connect(tmp_db)
-            cursor = conn.cursor()
-            
-            query = "SELECT host, path, isSecure, expiry, name, value FROM moz_cookies WHERE host LIKE '%x.com' OR host LIKE '%twitter.com'"
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            if rows:
-                with open(output_file, 'a', encoding='utf-8') as f:
-                    for row in rows:
-                        host, path, is_secure, expiry, name, value = row
-                        domain_flag = "TRUE" if host.startswith('.') else "FALSE"
-                        secure_flag = "TRUE" if is_secure else "FALSE"
-                        f.write(f"{host}\t{domain_flag}\t{path}\t{secure_flag}\t{expiry}\t{name}\t{value}\n")
-                total_cookies += len(rows)
-            conn.close()
-        except Exception:
-            pass
-        finally:
-            if os.path.exists(tmp_db):
-                os.remove(tmp_db)
 
-    if total_cookies > 0:
-        print(f"[SUCCESS] Extracted {total_cookies} cookies from Firefox.")
+    sources = source_mtimes(dbs)
+    if not force and jar_is_current(output_file, sources):
+        print(f"[INFO] Firefox cookies unchanged since the last extraction. Keeping {output_file}.")
         return True
-    else:
+
+    results = read_profiles(dbs, read_firefox_cookies)
+    db_path, rows = pick_logged_in_profile(results)
+    if not rows:
         print("[WARN] No X cookies found in any Firefox profile.")
         return False
 
+    print(f"[INFO] Using cookies from: {db_path}")
+    write_netscape_file(output_file, rows, generator="Generated from Firefox")
+    save_jar_sources(output_file, sources)
+    print(f"[SUCCESS] Extracted {len(rows)} cookies from Firefox.")
+    return True
+
+def extract(choice, output_file="cookies.txt", force=False):
+    appdata = os.getenv('LOCALAPPDATA')
+    
+    if choice == '1':
+        path = os.path.join(appdata, "Google", "Chrome", "User Data")
+        return extract_chromium_cookies("Chrome", path, output_file, force)
+    elif choice == '2':
+        return extract_firefox_cookies(output_file, force)
+    elif choice == '3':
+        path = os.path.join(appdata, "Microsoft", "Edge", "User Data")
+        return extract_chromium_cookies("Edge", path, output_file, force)
+    return False
+
 def main():
+    parser = argparse.ArgumentParser(description="Extract X (Twitter) cookies from a local browser.")
+    parser.add_argument("--browser", choices=["chrome", "firefox", "edge"], help="Browser to read, skipping the menu")
+    parser.add_argument("-o", "--output", default="cookies.txt", help="Output file")
+    parser.add_argument("--force", action="store_true", help="Extract again even if the browser's cookies did not change")
+    args = parser.parse_args()
+
+    # Non-interactive mode, e.g. to refresh cookies before every batch
+    if args.browser:
+        choice = {"chrome": '1', "firefox": '2', "edge": '3'}[args.browser]
+        if not extract(choice, args.output, args.force):
+            raise SystemExit(1)
+        return
+
     print("====================================")
     print("      Browser Cookie Extractor      ")
     print("====================================")
@@ -233,23 +315,9 @@ def main():
     
     choice = input("\nEnter number (1-3): ").strip()
     
-    appdata = os.getenv('LOCALAPPDATA')
-    roaming = os.getenv('APPDATA')
-    
-    if choice == '1':
-        path = os.path.join(appdata, "Google", "Chrome", "User Data")
-        if extract_chromium_cookies("Chrome", path):
-            print("\nDone! 'cookies.txt' has been created.")
-    
-    elif choice == '2':
-        if extract_firefox_cookies():
-            print("\nDone! 'cookies.txt' has been created.")
-            
-    elif choice == '3':
-        path = os.path.join(appdata, "Microsoft", "Edge", "User Data")
-        if extract_chromium_cookies("Edge", path):
-            print("\nDone! 'cookies.txt' has been created.")
-            
+    if choice in ('1', '2', '3'):
+        if extract(choice, args.output, args.force):
+            print(f"\nDone! '{args.output}' has been created.")
     elif choice == '0':
         print("Exiting.")
     else:
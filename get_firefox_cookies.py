@@ -1,9 +1,7 @@
 import os
-import shutil
-import sqlite3
-import tempfile
 import configparser
 import glob
+from get_cookies import read_firefox_cookies
 
 def find_all_cookie_dbs():
     """Finds all cookies.sqlite files in Firefox profiles."""
@@ -24,26 +22,12 @@ def extract_from_db(db_path, output_file="cookies.txt"):
     if not os.path.exists(db_path):
         return 0
 
-    # Copy to temp
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        tmp_db = tmp.name
-    
-    rows = []
+    # Read in place, without copying the database
     try:
-        shutil.copy2(db_path, tmp_db)
-        conn = sqlite3.connect(tmp_db)
-        cursor = conn.cursor()
-        
-        query = "SELECT host, path, isSecure, expiry, name, value FROM moz_cookies WHERE host LIKE '%x.com' OR host LIKE '%twitter.com'"
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        conn.close()
+        rows = read_firefox_cookies(db_path)
     except Exception as e:
         print(f"[DEBUG] Error reading {db_path}: {e}")
         return 0
-    finally:
-        if os.path.exists(tmp_db):
-            os.remove(tmp_db)
 
     if not rows:
         return 0
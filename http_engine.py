@@ -0,0 +1,257 @@
+import sys
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cookie_file import parse_netscape_cookies
+from url_files import read_usernames, write_urls, UrlSink, RecordSink
+from status_store import StatusStore
+from timeline_json import parse_timeline, parse_media_types, status_url
+from snowflake import parse_date, make_bounds
+
+API_BASE = "https://x.com/i/api"
+
+# The public bearer token of the X web app (the same one its JavaScript sends)
+BEARER_TOKEN = "AAAAAAAAAAAAAAAAAAAAANRILgAAAAAAnNwIzUejRCOuH5E6I8xnZz4puTs%3D1Zv7ttfk8LF81IUq16cHjhLTvJu4FA33AGWWjCpTnA"
+
+# GraphQL query IDs change whenever X deploys a new web build. If requests
+# start failing with 404, copy the current IDs from the browser's network tab
+# and pass them with --user-query-id / --media-query-id.
+USER_QUERY_ID = "xmU6X_CKVnQ5lSrCbAmJsg"
+MEDIA_QUERY_ID = "MOLbHrtk8Ovu7DUNOLcXiA"
+
+FEATURES = {
+    "hidden_profile_subscriptions_enabled": True,
+    "rweb_tipjar_consumption_enabled": True,
+    "responsive_web_graphql_exclude_directive_enabled": True,
+    "verified_phone_label_enabled": False,
+    "subscriptions_verification_info_is_identity_verified_enabled": True,
+    "subscriptions_verification_info_verified_since_enabled": True,
+    "highlights_tweets_tab_ui_enabled": True,
+    "responsive_web_twitter_article_notes_tab_enabled": True,
+    "subscriptions_feature_can_gift_premium": True,
+    "creator_subscriptions_tweet_preview_api_enabled": True,
+    "responsive_web_graphql_skip_user_profile_image_extensions_enabled": False,
+    "responsive_web_graphql_timeline_navigation_enabled": True,
+    "communities_web_enable_tweet_community_results_fetch": True,
+    "c9s_tweet_anatomy_moderator_badge_enabled": True,
+    "articles_preview_enabled": True,
+    "tweetypie_unmention_optimization_enabled": True,
+    "responsive_web_edit_tweet_api_enabled": True,
+    "graphql_is_translatable_rweb_tweet_is_translatable_enabled": True,
+    "view_counts_everywhere_api_enabled": True,
+    "longform_notetweets_consumption_enabled": True,
+    "responsive_web_twitter_article_tweet_consumption_enabled": True,
+    "tweet_awards_web_tipping_enabled": False,
+    "creator_subscriptions_quote_tweet_preview_enabled": False,
+    "freedom_of_speech_not_reach_fetch_enabled": True,
+    "standardized_nudges_misinfo": True,
+    "tweet_with_visibility_results_prefer_gql_limited_actions_policy_enabled": True,
+    "rweb_video_timestamps_enabled": True,
+    "longform_notetweets_rich_text_read_enabled": True,
+    "longform_notetweets_inline_media_enabled": True,
+    "responsive_web_enhance_cards_enabled": False,
+}
+
+class TimelineClient:
+    """Pages through media timelines over plain HTTP, without a browser.
+
+    One keep-alive connection pool is shared by all requests, so it can be
+    used from several threads at once.
+    """
+
+    def __init__(self, cookies, api_base=API_BASE, pool_size=4, timeout=30,
+                 user_query_id=USER_QUERY_ID, media_query_id=MEDIA_QUERY_ID, max_rate_limit_wait=900):
+        self.api_base = api_base.rstrip("/")
+        self.timeout = timeout
+        self.user_query_id = user_query_id
+        self.media_query_id = media_query_id
+        self.max_rate_limit_wait = max_rate_limit_wait
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        csrf_token = None
+        for cookie in cookies:
+            self.session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+            if cookie['name'] == "ct0":
+                csrf_token = cookie['value']
+        self.session.headers.update({
+            "authorization": f"Bearer {BEARER_TOKEN}",
+            "x-csrf-token": csrf_token or "",
+            "x-twitter-auth-type": "OAuth2Session",
+            "x-twitter-active-user": "yes",
+            "content-type": "application/json",
+            "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+        })
+
+    def graphql(self, query_id, operation, variables):
+        url = f"{self.api_base}/graphql/{query_id}/{operation}"
+        params = {
+            "variables": json.dumps(variables, separators=(",", ":")),
+            "features": json.dumps(FEATURES, separators=(",", ":")),
+        }
+        while True:
+            response = self.session.get(url, params=params, timeout=self.timeout)
+            if response.status_code != 429:
+                response.raise_for_status()
+                return response.json()
+
+            # Rate limited: wait for the window to reset
+            reset = int(response.headers.get("x-rate-limit-reset", 0))
+            wait = max(reset - time.time(), 5)
+            if wait > self.max_rate_limit_wait:
+                response.raise_for_status()
+            print(f"[WARN] Rate limited on {operation}. Waiting {wait:.0f}s...")
+            time.sleep(wait)
+
+    def get_user_id(self, screen_name):
+        data = self.graphql(self.user_query_id, "UserByScreenName", {"screen_name": screen_name})
+        result = data.get("data", {}).get("user", {}).get("result", {})
+        if not result.get("rest_id"):
+            raise ValueError(f"User not found: {screen_name}")
+        return result["rest_id"]
+
+    def iter_media(self, screen_name, page_size=20):
+        """Yields the media items of a user's timeline, following the bottom cursor."""
+        user_id = self.get_user_id(screen_name)
+        cursor = None
+        while True:
+            variables = {
+                "userId": user_id,
+                "count": page_size,
+                "includePromotedContent": False,
+                "withClientEventToken": False,
+                "withBirdwatchNotes": False,
+                "withVoice": True,
+                "withV2Timeline": True,
+            }
+            if cursor:
+                variables["cursor"] = cursor
+            items, cursors = parse_timeline(self.graphql(self.media_query_id, "UserMedia", variables))
+            yield from items
+
+            # The last page still has a bottom cursor, but no more entries
+            next_cursor = cursors.get("Bottom")
+            if not items or not next_cursor or next_cursor == cursor:
+                return
+            cursor = next_cursor
+
+def fetch_video_urls(client, username, on_url=None, media_types=None, bounds=None, stop_after_past=5):
+    """Returns the status URLs of a user's media timeline, newest first.
+
+    `on_url` is called with each URL and its media type as soon as it is found.
+    If `media_types` is given, posts of other types are skipped. With `bounds`,
+    posts outside its ID window are skipped and no more pages are fetched
+    once `stop_after_past` posts in a row are older than the window.
+    """
+    found = StatusStore()
+    past_streak = 0
+    for item in client.iter_media(username):
+        if bounds is not None and not bounds.contains(item["status_id"]):
+            past_streak = past_streak + 1 if bounds.is_past(item["status_id"]) else 0
+            if stop_after_past and past_streak >= stop_after_past:
+                print(f"[INFO] {username}: passed the start of the date range. Stopping.")
+                break
+            continue
+        past_streak = 0
+        if media_types and item["media_type"] not in media_types:
+            continue
+        account = item["screen_name"] or username
+        if found.add(account, item["status_id"]):
+            url = status_url(account, item["status_id"])
+            print(f"[FOUND] {url} ({item['media_type']})")
+            if on_url is not None:
+                on_url(url, item["media_type"])
+    return found.urls()
+
+def main():
+    # Determine the directory where the script/exe is located
+    if getattr(sys, 'frozen', False):
+        application_path = os.path.dirname(sys.executable)
+    else:
+        application_path = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Scrape X (Twitter) video URLs over HTTP, without a browser.")
+    parser.add_argument("usernames", nargs="*", metavar="username", help="The X username(s) (without @)")
+    parser.add_argument("-c", "--cookies", default=os.path.join(application_path, "cookies.txt"), help="Path to cookies.txt")
+    parser.add_argument("-o", "--output", default="urls.txt", help="Output file, written as URLs are found. Use - for stdout")
+    parser.add_argument("--sorted", action="store_true", help="Write the output sorted by status ID, oldest first")
+    parser.add_argument("--format", choices=["txt", "jsonl"], default="txt", help="One URL per line (txt) or JSON records (jsonl, always sorted)")
+    parser.add_argument("--shards", type=int, default=1, help="Split the sorted output into this many files (default: 1)")
+    parser.add_argument("--shard-by", choices=["balanced", "hash"], default="balanced", help="Balance the shards by count or pick them by a hash of the ID (default: balanced)")
+    parser.add_argument("-b", "--batch", help="File with one username per line")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Number of accounts fetched in parallel (default: 4)")
+    parser.add_argument("--output-dir", default="urls", help="Directory for per-account output files with several accounts (default: urls)")
+    parser.add_argument("--media", default="video,gif,image", help="Comma-separated media types to output: video, gif, image (default: all)")
+    parser.add_argument("--since", type=parse_date, help="Only posts from this date on (YYYY-MM-DD or ISO time, UTC)")
+    parser.add_argument("--until", type=parse_date, help="Only posts before this date (YYYY-MM-DD or ISO time, UTC)")
+    parser.add_argument("--since-id", type=int, help="Only posts newer than this status ID")
+    parser.add_argument("--api-base", default=API_BASE, help="Base URL of the API, e.g. a local stand-in server for testing")
+    parser.add_argument("--user-query-id", default=USER_QUERY_ID, help="GraphQL query ID of UserByScreenName")
+    parser.add_argument("--media-query-id", default=MEDIA_QUERY_ID, help="GraphQL query ID of UserMedia")
+    args = parser.parse_args()
+
+    usernames = [u.lstrip('@') for u in args.usernames]
+    if args.batch:
+        usernames += read_usernames(args.batch)
+    if not usernames:
+        parser.error("No username provided.")
+
+    if not os.path.exists(args.cookies):
+        print(f"[ERROR] Cookie file not found at: {args.cookies}")
+        return
+    client = TimelineClient(
+        parse_netscape_cookies(args.cookies),
+        api_base=args.api_base,
+        pool_size=args.workers,
+        user_query_id=args.user_query_id,
+        media_query_id=args.media_query_id,
+    )
+
+    structured = args.sorted or args.format == "jsonl" or args.shards > 1
+    if structured and args.output == "-":
+        parser.error("--sorted, --format jsonl and --shards need an output file, not stdout.")
+    if args.output == "-":
+        # Keep stdout for URLs only, e.g. for `yt-dlp -a -`
+        sys.stdout = sys.stderr
+    if structured:
+        sink = RecordSink(args.output, fmt=args.format, shards=args.shards, shard_by=args.shard_by)
+    else:
+        sink = UrlSink(args.output)
+    media_types = parse_media_types(args.media)
+    bounds = make_bounds(args.since, args.until, args.since_id)
+
+    def scrape(username):
+        try:
+            return fetch_video_urls(client, username, on_url=sink.write, media_types=media_types, bounds=bounds)
+        except Exception as e:
+            print(f"[ERROR] {username} failed: {e}")
+            return None
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = dict(zip(usernames, pool.map(scrape, usernames)))
+    finally:
+        sink.close()
+
+    if len(usernames) > 1:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for username, urls in results.items():
+            if urls is not None:
+                write_urls(os.path.join(args.output_dir, f"{username}.txt"), urls)
+
+    if sink.count:
+        print(f"\n[SUCCESS] Completed. Found {sink.count} videos.")
+    else:
+        print("\n[RESULT] No videos found.")
+
+if __name__ == "__main__":
+    main()
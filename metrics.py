@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+class RunMetrics:
+    """Collects per-phase durations and per-scroll counters for a scraper run.
+
+    Phases are aggregated by (phase, account), so a phase that runs once per
+    scroll iteration shows up as one entry with a count, total and maximum.
+    Safe to share between batch workers.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.lock = threading.Lock()
+        # (phase, account) -> [count, total_seconds, max_seconds]
+        self.phases = {}
+        # account -> list of iteration dicts
+        self.iterations = {}
+        # account -> URLs found
+        self.urls_found = {}
+        # account -> "completed", "throttled" or "interrupted"
+        self.statuses = {}
+        # account -> list of memory sample dicts
+        self.memory = {}
+
+    @contextmanager
+    def phase(self, name, account=""):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - start, account)
+
+    def add_phase(self, name, seconds, account=""):
+        with self.lock:
+            entry = self.phases.setdefault((name, account), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def record_iteration(self, account, links_seen, new_urls, height_delta, retries, wait):
+        with self.lock:
+            self.iterations.setdefault(account, []).append({
+                "links_seen": links_seen,
+                "new_urls": new_urls,
+                "height_delta": height_delta,
+                "retries": retries,
+                "wait_s": round(wait, 3),
+            })
+
+    def record_memory(self, account, scroll, js_heap_bytes, dom_nodes):
+        with self.lock:
+            self.memory.setdefault(account, []).append({
+                "scroll": scroll,
+                "js_heap_bytes": int(js_heap_bytes),
+                "dom_nodes": int(dom_nodes),
+                "at": round(time.time() - self.started, 3),
+            })
+
+    def set_urls_found(self, account, count):
+        with self.lock:
+            self.urls_found[account] = count
+
+    def set_scan_status(self, account, status):
+        with self.lock:
+            self.statuses[account] = status
+
+    def scan_status(self, account):
+        with self.lock:
+            return self.statuses.get(account)
+
+    def summary(self):
+        with self.lock:
+            phases = {}
+            accounts = {}
+            for (name, account), (count, total, longest) in sorted(self.phases.items()):
+                stats = {"count": count, "total_s": round(total, 3), "max_s": round(longest, 3)}
+                if account:
+                    accounts.setdefault(account, {"phases": {}})["phases"][name] = stats
+                # Run-wide totals over all accounts
+                overall = phases.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+                overall["count"] += count
+                overall["total_s"] = round(overall["total_s"] + total, 3)
+                overall["max_s"] = max(overall["max_s"], round(longest, 3))
+            for account in set(self.iterations) | set(self.urls_found) | set(self.statuses) | set(self.memory):
+                iterations = self.iterations.get(account, [])
+                info = accounts.setdefault(account, {"phases": {}})
+                info["status"] = self.statuses.get(account)
+                info["urls_found"] = self.urls_found.get(account, 0)
+                info["scroll_iterations"] = len(iterations)
+                info["iterations"] = list(iterations)
+                if account in self.memory:
+                    info["memory"] = list(self.memory[account])
+            return {
+                "started_at": self.started,
+                "run_s": round(time.time() - self.started, 3),
+                "phases": phases,
+                "accounts": accounts,
+            }
+
+    def write_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_prometheus(self, path):
+        """Writes the summary in the Prometheus textfile collector format."""
+        summary = self.summary()
+        lines = [
+            "# HELP xscraper_run_duration_seconds Wall time of the scraper run.",
+            "# TYPE xscraper_run_duration_seconds gauge",
+            f"xscraper_run_duration_seconds {summary['run_s']}",
+            "# HELP xscraper_run_timestamp_seconds Start time of the scraper run.",
+            "# TYPE xscraper_run_timestamp_seconds gauge",
+            f"xscraper_run_timestamp_seconds {summary['started_at']:.0f}",
+            "# HELP xscraper_phase_seconds_total Time spent per phase.",
+            "# TYPE xscraper_phase_seconds_total counter",
+        ]
+        for name, stats in summary["phases"].items():
+            lines.append(f'xscraper_phase_seconds_total{{phase="{name}"}} {stats["total_s"]}')
+        lines += [
+            "# HELP xscraper_phase_runs_total Number of times each phase ran.",
+            "# TYPE xscraper_phase_runs_total counter",
+        ]
+        for name, stats in summary["phases"].items():
+            lines.append(f'xscraper_phase_runs_total{{phase="{name}"}} {stats["count"]}')
+
+        per_account = [
+            ("urls_found", "xscraper_account_urls_found", "URLs found per account."),
+            ("scroll_iterations", "xscraper_account_scroll_iterations", "Scroll iterations per account."),
+        ]
+        for key, metric, help_text in per_account:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for account, info in summary["accounts"].items():
+                if key in info:
+                    lines.append(f'{metric}{{account="{account}"}} {info[key]}')
+        per_account_memory = [
+            ("js_heap_bytes", "xscraper_account_js_heap_bytes", "JS heap of the tab at the last memory sample."),
+            ("dom_nodes", "xscraper_account_dom_nodes", "DOM nodes in the tab at the last memory sample."),
+        ]
+        for key, metric, help_text in per_account_memory:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for account, info in summary["accounts"].items():
+                if info.get("memory"):
+                    lines.append(f'{metric}{{account="{account}"}} {info["memory"][-1][key]}')
+        lines += [
+            "# HELP xscraper_account_throttled Whether the account's scan ended rate limited (1) or not (0).",
+            "# TYPE xscraper_account_throttled gauge",
+        ]
+        for account, info in summary["accounts"].items():
+            if info.get("status"):
+                lines.append(f'xscraper_account_throttled{{account="{account}"}} {int(info["status"] == "throttled")}')
+        lines += [
+            "# HELP xscraper_account_phase_seconds Time spent per phase and account.",
+            "# TYPE xscraper_account_phase_seconds gauge",
+        ]
+        for account, info in summary["accounts"].items():
+            for name, stats in info["phases"].items():
+                lines.append(f'xscraper_account_phase_seconds{{account="{account}",phase="{name}"}} {stats["total_s"]}')
+
+        # Write then rename, so the collector never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
@@ -0,0 +1,107 @@
+import queue
+import shutil
+import threading
+import subprocess
+
+class YtDlpDownloader:
+    """Downloads one URL per call by running yt-dlp. Raises on failure.
+
+    yt-dlp's own progress output is discarded, so it does not mix with the
+    scan's log or a URL stream on stdout; its last error line is kept.
+    """
+
+    def __init__(self, extra_args=(), executable="yt-dlp"):
+        self.executable = shutil.which(executable)
+        if not self.executable:
+            raise FileNotFoundError(f"{executable} not found. Install it or add it to PATH.")
+        self.extra_args = list(extra_args)
+
+    def __call__(self, url):
+        result = subprocess.run(
+            [self.executable, *self.extra_args, url],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+        )
+        if result.returncode != 0:
+            lines = result.stderr.strip().splitlines()
+            raise RuntimeError(lines[-1] if lines else f"yt-dlp exited with code {result.returncode}")
+
+class DownloadPipeline:
+    """Downloads URLs while the scan that finds them is still running.
+
+    URLs pass through a bounded queue to a pool of download workers. When the
+    queue is full, submit() blocks, so scrolling slows down to the download
+    pace instead of piling up work (backpressure). Each URL is retried up to
+    `max_attempts` times with a growing delay.
+
+    `downloader` is any callable taking a URL and raising on failure, so tests
+    can swap yt-dlp for a stub.
+    """
+
+    def __init__(self, downloader, workers=2, queue_size=32, max_attempts=3, retry_delay=5.0):
+        self.downloader = downloader
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.work = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        # url -> {"status": "pending" | "done" | "failed", "attempts": n, "error": str}
+        self.results = {}
+        self.abort = threading.Event()
+        self.threads = [
+            threading.Thread(target=self.worker, args=(i + 1,), daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self.threads:
+            t.start()
+
+    def submit(self, url, media_type=None):
+        """Queues a URL for download, blocking while the queue is full."""
+        with self.lock:
+            if url in self.results:
+                return
+            self.results[url] = {"status": "pending", "attempts": 0, "error": None}
+        self.work.put(url)
+
+    def worker(self, worker_id):
+        while True:
+            url = self.work.get()
+            if url is None:
+                return
+            record = self.results[url]
+            while not self.abort.is_set():
+                record["attempts"] += 1
+                try:
+                    self.downloader(url)
+                    record["status"] = "done"
+                    print(f"[DOWNLOADED] [worker {worker_id}] {url}")
+                    break
+                except Exception as e:
+                    record["error"] = str(e)
+                    if record["attempts"] >= self.max_attempts:
+                        record["status"] = "failed"
+                        print(f"[ERROR] [worker {worker_id}] Download failed after {record['attempts']} attempts: {url} ({e})")
+                        break
+                    delay = self.retry_delay * record["attempts"]
+                    print(f"[WARN] [worker {worker_id}] Download failed, retrying in {delay:.0f}s: {url} ({e})")
+                    self.abort.wait(delay)
+
+    def close(self):
+        """Waits for queued downloads to finish. Returns the per-URL results.
+
+        A Ctrl+C while waiting abandons the downloads still in progress.
+        """
+        try:
+            for _ in self.threads:
+                self.work.put(None)
+            for t in self.threads:
+                while t.is_alive():
+                    t.join(0.5)
+        except KeyboardInterrupt:
+            print("\n[INFO] Stopped waiting for downloads.")
+            self.abort.set()
+        return self.results
+
+    def summary(self):
+        counts = {"done": 0, "failed": 0, "pending": 0}
+        for record in self.results.values():
+            counts[record["status"]] += 1
+        return counts
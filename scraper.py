@@ -1,114 +1,634 @@
 import sys
 import time
 import json
+import base64
 import os
 import argparse
+import queue
+import threading
+import shlex
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException, SessionNotCreatedException, WebDriverException
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+from cookie_file import parse_netscape_cookies
+from url_files import read_usernames, write_urls, UrlSink, RecordSink
+from status_index import StatusIndex
+from status_store import StatusStore, parse_status_url
+from metrics import RunMetrics
+from pipeline import DownloadPipeline, YtDlpDownloader
+from timeline_json import parse_timeline, parse_media_types, status_url
+from snowflake import parse_date, make_bounds
+from throttle import Throttle, SessionPool, ScanThrottled
+from cdp_backend import CDPDriver
+
+def resolve_chromedriver(cache_path=None, refresh=False):
+    """Returns the chromedriver path, reusing the cached resolution unless told to refresh."""
+    if cache_path and not refresh and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if os.path.exists(cached["path"]):
+                return cached["path"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    path = ChromeDriverManager().install()
+    if cache_path:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({"path": path, "resolved_at": time.time()}, f)
+    return path
+
+# Requests the scraper never needs: media grid thumbnails, video previews and fonts
+BLOCKED_URL_PATTERNS = [
+    "*pbs.twimg.com/media/*",
+    "*pbs.twimg.com/*_thumb/*",
+    "*pbs.twimg.com/profile_*",
+    "*video.twimg.com/*",
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*",
+    "*.mp4*", "*.m3u8*", "*.m4s*",
+    "*.woff", "*.woff2", "*.ttf",
+]
+
+def setup_driver(driver_cache=None, refresh_driver=False, profile_dir=None,
+                 lean=False, headless=False, window_size=None, capture_network=False, backend="selenium",
+                 cdp_browser=None):
+    """Sets up the Chrome WebDriver with options.
+
+    `driver_cache` is a JSON file remembering the resolved chromedriver path,
+    and `profile_dir` a Chrome user-data directory kept between runs.
+    In `lean` mode images, media and fonts are never downloaded.
+    `capture_network` enables the performance log used by NetworkCapture.
+
+    The "cdp" backend starts Chrome without chromedriver and drives it over
+    the DevTools protocol (see cdp_backend.CDPDriver), behind the same calls.
+    Given a `cdp_browser` (see start_shared_browser), it opens an isolated
+    tab in that browser instead of starting another one.
+    """
+    if backend == "cdp" and cdp_browser is not None:
+        return cdp_browser.new_tab(capture_network, BLOCKED_URL_PATTERNS if lean else None)
+
+    arguments = ["--disable-notifications"]
+    if window_size:
+        arguments.append(f"--window-size={window_size[0]},{window_size[1]}")
+    else:
+        arguments.append("--start-maximized")
+    arguments.append("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    if headless:
+        arguments.append("--headless=new")
+    if lean:
+        arguments.append("--blink-settings=imagesEnabled=false")
+        arguments.append("--autoplay-policy=user-gesture-required")
+        arguments.append("--mute-audio")
+
+    if backend == "cdp":
+        return CDPDriver.launch(
+            arguments,
+            profile_dir=profile_dir,
+            capture_network=capture_network,
+            blocked_urls=BLOCKED_URL_PATTERNS if lean else None,
+        )
 
-def setup_driver():
-    """Sets up the Chrome WebDriver with options."""
     options = webdriver.ChromeOptions()
-    options.add_argument("--disable-notifications")
-    options.add_argument("--start-maximized")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    for argument in arguments:
+        options.add_argument(argument)
+    if profile_dir:
+        options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    if lean:
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if capture_network:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver_path = resolve_chromedriver(driver_cache, refresh_driver)
+    try:
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+    except SessionNotCreatedException:
+        if not driver_cache or refresh_driver:
+            raise
+        # Chrome was probably updated since the driver was cached
+        print("[WARN] Cached chromedriver does not match Chrome. Resolving it again...")
+        driver_path = resolve_chromedriver(driver_cache, refresh=True)
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+    if lean:
+        # Blocked URLs stay in effect for every later navigation of the tab
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
     return driver
 
+def parse_window_size(value):
+    """Parses a WIDTHxHEIGHT string for --window-size."""
+    try:
+        width, height = value.lower().split("x")
+        return int(width), int(height)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected WIDTHxHEIGHT, got: {value}")
+
+def has_session(driver):
+    """Checks whether the browser already holds an X login cookie, without navigating."""
+    cookies = driver.execute_cdp_cmd("Network.getCookies", {"urls": ["https://x.com"]})
+    return any(c["name"] == "auth_token" for c in cookies.get("cookies", []))
+
+def to_cdp_cookie(cookie):
+    """Converts a Selenium-style cookie dict to a DevTools CookieParam."""
+    cdp_cookie = {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': cookie['domain'],
+        'path': cookie['path'],
+        'secure': cookie['secure'],
+    }
+    if 'expiry' in cookie:
+        cdp_cookie['expires'] = cookie['expiry']
+    return cdp_cookie
+
+def install_cookies(driver, cookies):
+    """Installs cookies straight into the browser's cookie store with one DevTools call.
+
+    Unlike add_cookie this needs no page of the cookie's domain to be loaded,
+    so it can run before the first navigation. Returns the rejected cookies
+    as (cookie, reason) pairs.
+    """
+    now = time.time()
+    rejected = []
+    valid = []
+    for cookie in cookies:
+        if 'expiry' in cookie and cookie['expiry'] < now:
+            rejected.append((cookie, "expired"))
+        else:
+            valid.append(cookie)
+
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": [to_cdp_cookie(c) for c in valid]})
+        return rejected
+    except WebDriverException:
+        # One invalid cookie fails the whole batch, so find out which ones Chrome refuses
+        pass
+
+    for cookie in valid:
+        try:
+            result = driver.execute_cdp_cmd("Network.setCookie", to_cdp_cookie(cookie))
+            if not result.get("success", True):
+                rejected.append((cookie, "refused by Chrome"))
+        except WebDriverException as e:
+            rejected.append((cookie, e.msg or "refused by Chrome"))
+    return rejected
+
 def load_netscape_cookies(driver, filepath):
-    """Loads cookies from a Netscape HTTP Cookie File (cookies.txt)."""
+    """Loads cookies from a Netscape HTTP Cookie File (cookies.txt).
+
+    All cookies are installed in one bulk operation, which works before any
+    page is loaded. Cookies the browser rejected are reported.
+    """
     if not os.path.exists(filepath):
         print(f"[ERROR] Cookie file not found: {filepath}")
         return False
 
-    count = 0
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.startswith('#') or not line.strip():
+        cookies = parse_netscape_cookies(filepath)
+    except Exception as e:
+        print(f"[ERROR] Failed to parse cookie file: {e}")
+        return False
+
+    rejected = install_cookies(driver, cookies)
+    print(f"[INFO] Loaded {len(cookies) - len(rejected)} cookies from {filepath}")
+    for cookie, reason in rejected:
+        print(f"[WARN] Cookie rejected: {cookie['name']} ({cookie['domain']}): {reason}")
+    return True
+
+# Returns [new_items, total_links], each item being [status_url, media_type].
+# Links are cut down to the post itself (dropping the query string and
+# /photo/N, /video/N suffixes) and remembered in the page, so each post is
+# only sent back once. The media type ("video", "gif" or "image") comes from
+# the markers X draws on the grid cell: a GIF badge, a duration label or a
+# video element.
+HARVEST_SCRIPT = r"""
+const prune = arguments[0];
+const seen = window.__xvsSeen || (window.__xvsSeen = new Set());
+const links = document.querySelectorAll('a[href*="/status/"]');
+const classify = (link) => {
+    const cell = link.closest('li, [data-testid="cellInnerDiv"]') || link;
+    const labels = Array.from(cell.querySelectorAll('span'), (s) => s.textContent.trim());
+    // GIFs link to /video/N as well, so the badge is checked first
+    if (labels.includes('GIF')) return 'gif';
+    if (/\/video\/\d+/.test(link.href)
+        || cell.querySelector('video, [data-testid="videoPlayer"], [data-testid="videoComponent"]')
+        || labels.some((text) => /^\d+:\d{2}(:\d{2})?$/.test(text))) return 'video';
+    return 'image';
+};
+const fresh = [];
+for (const link of links) {
+    const match = link.href.split('?')[0].match(/^.*?\/status\/\d+/);
+    if (!match || seen.has(match[0])) continue;
+    seen.add(match[0]);
+    fresh.push([match[0], classify(link)]);
+}
+// Cells far above the viewport are all harvested by now. Their images and
+// videos are released and their rendering skipped, while the cell keeps its
+// height so the scroll position and X's own loading trigger are unchanged.
+let pruned = 0;
+if (prune) {
+    const margin = 2 * window.innerHeight;
+    const cells = new Set();
+    for (const link of links) {
+        const cell = link.closest('li, [data-testid="cellInnerDiv"]');
+        if (cell && !cell.dataset.xvsPruned) cells.add(cell);
+    }
+    for (const cell of cells) {
+        const rect = cell.getBoundingClientRect();
+        if (rect.bottom > -margin) continue;
+        for (const img of cell.querySelectorAll('img')) {
+            img.removeAttribute('srcset');
+            img.removeAttribute('src');
+        }
+        for (const video of cell.querySelectorAll('video')) {
+            video.pause();
+            video.removeAttribute('src');
+            video.removeAttribute('poster');
+            video.load();
+        }
+        for (const el of cell.querySelectorAll('[style*="background-image"]')) el.style.backgroundImage = 'none';
+        cell.style.containIntrinsicSize = `${rect.width}px ${rect.height}px`;
+        cell.style.contentVisibility = 'hidden';
+        cell.dataset.xvsPruned = '1';
+        pruned++;
+    }
+}
+return [fresh, links.length, pruned];
+"""
+
+# Scrolls to the bottom and waits until new status links stop arriving.
+# Resolves with [added, elapsed_ms, loading] once links were added and the
+# page has been quiet for `settle` ms (but not before `minWait` ms), or when
+# `maxWait` ms pass. `loading` tells whether a spinner is still showing.
+SCROLL_WAIT_SCRIPT = """
+const [minWait, maxWait, settle] = [arguments[0], arguments[1], arguments[2]];
+const done = arguments[arguments.length - 1];
+const start = performance.now();
+let added = 0;
+let lastChange = start;
+const isStatusLink = (node) => node.nodeType === 1 && (
+    (node.matches('a[href*="/status/"]')) || node.querySelector('a[href*="/status/"]'));
+const observer = new MutationObserver((mutations) => {
+    for (const m of mutations) {
+        if (m.type === 'attributes') {
+            if (isStatusLink(m.target)) { added++; lastChange = performance.now(); }
+            continue;
+        }
+        for (const node of m.addedNodes) {
+            if (isStatusLink(node)) { added++; lastChange = performance.now(); }
+        }
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true, attributes: true, attributeFilter: ['href']});
+window.scrollTo(0, document.body.scrollHeight);
+const tick = () => {
+    const now = performance.now();
+    const elapsed = now - start;
+    if (elapsed >= maxWait || (added > 0 && elapsed >= minWait && now - lastChange >= settle)) {
+        observer.disconnect();
+        // When rate limited, the timeline shows an error with a Retry button instead of new posts
+        const errorShown = added === 0 && [...document.querySelectorAll('main button, main [role="button"]')]
+            .some((b) => /^(Retry|Try again)$/i.test(b.textContent.trim()));
+        done([added, elapsed, !!document.querySelector('[role="progressbar"]'), errorShown]);
+        return;
+    }
+    setTimeout(tick, 50);
+};
+setTimeout(tick, 50);
+"""
+
+RETRY_SCRIPT = """
+const button = [...document.querySelectorAll('main button, main [role="button"]')]
+    .find((b) => /^(Retry|Try again)$/i.test(b.textContent.trim()));
+if (button) button.click();
+return !!button;
+"""
+
+class NetworkCapture:
+    """Reads timeline API responses from Chrome's performance log.
+
+    Needs a driver set up with `capture_network=True`. Items come straight
+    from the JSON payloads, so grid cells that X recycles are never missed.
+    """
+
+    def __init__(self, driver, endpoint="/UserMedia"):
+        self.driver = driver
+        self.endpoint = endpoint
+        # Request IDs of timeline responses that are still loading
+        self.pending = set()
+        self.pages = 0
+        self.items_seen = 0
+        self.cursor = None
+        self.exhausted = False
+        # Set when a timeline request was answered with 429, to the reset time if X sent one
+        self.rate_limited = None
+
+    def drain(self):
+        """Discards log entries left over from earlier pages."""
+        self.driver.get_log("performance")
+        self.pending.clear()
+
+    def poll(self):
+        """Returns the items of all timeline responses finished since the last poll."""
+        items = []
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                response = params["response"]
+                if self.endpoint not in response["url"]:
                     continue
-                
-                parts = line.strip().split('\t')
-                if len(parts) >= 7:
-                    domain = parts[0]
-                    # Selenium strictly matches domains. Ensure it matches x.com or .x.com or twitter.com
-                    # We will filter for relevant domains to avoid putting garbage
-                    if "x.com" not in domain and "twitter.com" not in domain:
-                        continue
+                if response.get("status") == 429:
+                    headers = {k.lower(): v for k, v in response.get("headers", {}).items()}
+                    self.rate_limited = float(headers.get("x-rate-limit-reset", 0))
+                else:
+                    self.pending.add(params["requestId"])
+            elif method == "Network.loadingFinished" and params.get("requestId") in self.pending:
+                self.pending.discard(params["requestId"])
+                items.extend(self.read_response(params["requestId"]))
+        return items
 
-                    cookie = {
-                        'domain': domain,
-                        'name': parts[5],
-                        'value': parts[6],
-                        'path': parts[2],
-                        'secure': parts[3].lower() == 'true'
-                    }
-                    # Handle expiration if present
-                    if parts[4] and parts[4] != "0":
-                         cookie['expiry'] = int(parts[4])
-
-                    try:
-                        driver.add_cookie(cookie)
-                        count += 1
-                    except Exception as e:
-                        # Ignore specific cookie errors (some sophisticated cookies might fail)
-                        pass
-        
-        print(f"[INFO] Loaded {count} cookies from {filepath}")
+    def read_response(self, request_id):
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            body = response["body"]
+            if response.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8")
+            payload = json.loads(body)
+        except Exception as e:
+            print(f"[WARN] Could not read a timeline response: {e}")
+            return []
+
+        items, cursors = parse_timeline(payload)
+        self.pages += 1
+        self.items_seen += len(items)
+        self.cursor = cursors.get("Bottom", self.cursor)
+        # X keeps returning a bottom cursor at the end, but with no more entries
+        if not items:
+            self.exhausted = True
+        return items
+
+class MemoryProbe:
+    """Samples the tab's memory through the DevTools Performance domain."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.enabled = False
+        self.failed = False
+
+    def sample(self, metrics, account, scroll):
+        if self.failed:
+            return
+        try:
+            if not self.enabled:
+                self.driver.execute_cdp_cmd("Performance.enable", {})
+                self.enabled = True
+            result = self.driver.execute_cdp_cmd("Performance.getMetrics", {})
+        except Exception as e:
+            print(f"[WARN] Memory sampling is not available: {e}")
+            self.failed = True
+            return
+        values = {m["name"]: m["value"] for m in result["metrics"]}
+        heap = values.get("JSHeapUsedSize", 0)
+        nodes = values.get("Nodes", 0)
+        metrics.record_memory(account, scroll, heap, nodes)
+        print(f"[DEBUG] Memory after {scroll} scrolls: JS heap {heap / 1024 / 1024:.1f} MB, {nodes:.0f} DOM nodes.")
+
+def wait_for_status_links(driver, timeout):
+    """Waits until the first status link is rendered. Returns False on timeout."""
+    try:
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href*="/status/"]'))
+        )
         return True
-    except Exception as e:
-        print(f"[ERROR] Failed to parase cookie file: {e}")
+    except TimeoutException:
         return False
 
-def get_video_urls(driver, target_username):
-    """Scrapes video URLs from the user's media tab."""
-    base_url = f"https://x.com/{target_username}/media"
-    driver.get(base_url)
-    
+def get_video_urls(driver, target_username, index=None, incremental=False, stop_after_known=10,
+                   min_wait=0.3, max_wait=4.0, max_retries=3, load_timeout=15, engine="dom",
+                   on_url=None, media_types=None, site="https://x.com", metrics=None,
+                   bounds=None, stop_after_past=5, throttle=None, max_throttle_waits=2, max_scrolls=None,
+                   prune=False, memory_every=0, indexed=None, flush_output=None):
+    """Scrapes video URLs from the user's media tab. Returns them newest first.
+
+    Every URL found is recorded in `index` if one is given. In incremental
+    mode only URLs not already indexed are returned, and the scan stops once
+    `stop_after_known` indexed posts have been seen in a row. Posts this scan
+    adds to the index are also added to `indexed` (a StatusStore) if given,
+    and posts already in it do not count as known. This lets a scan retried
+    after rate limiting read past the posts its first attempt indexed.
+
+    Each scroll waits between `min_wait` and `max_wait` seconds for new
+    links, adapting to how fast they have been arriving. The scan ends once a
+    scroll waited the full `max_wait` without new links or a loading
+    spinner, or after `max_retries` scrolls in a row that bring in nothing.
+
+    The "dom" engine reads status links from the page, the "network" engine
+    reads the timeline API responses instead (see NetworkCapture).
+
+    `on_url` is called with each URL and its media type as soon as it is
+    found, and `flush_output` before the index is committed, so no post is
+    marked as seen before it is on disk. If `media_types` is given (e.g. {"video", "gif"}), posts of other
+    types are indexed but not returned. `site` can point the scan at another
+    server, such as the benchmark's simulated timeline. Phase timings and
+    per-scroll counters are recorded in `metrics` if one is given.
+
+    With `bounds` (a snowflake.ScanBounds), posts outside its ID window are
+    skipped, and since the media tab runs newest first, the scan stops once
+    `stop_after_past` posts in a row are older than the window.
+
+    Rate limiting is detected from 429 responses (network engine) or the
+    timeline's error and Retry button. Each hit backs off and slows scrolling
+    through `throttle` (a new Throttle if none is given, so browsers sharing
+    cookies can share one). After `max_throttle_waits` waits in a row the scan gives
+    up and raises ScanThrottled with the URLs found so far. The outcome
+    ("completed", "throttled" or "interrupted") is recorded in `metrics`.
+
+    `max_scrolls` caps the number of scrolls, e.g. to read only the top of
+    the timeline (0 reads the first screen only).
+
+    With `prune`, grid cells far above the viewport are emptied of their
+    media after they were harvested, so Chrome's memory stays flat on very
+    long timelines. Every `memory_every` scrolls the tab's JS heap and DOM
+    node count are sampled into `metrics`.
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+    if throttle is None:
+        throttle = Throttle()
+    memory = MemoryProbe(driver) if memory_every else None
+    capture = None
+    if engine == "network":
+        capture = NetworkCapture(driver)
+        capture.drain()
+
+    base_url = f"{site}/{target_username}/media"
     print(f"[INFO] Navigating to {base_url}...")
-    time.sleep(5) 
+    with metrics.phase("navigation", target_username):
+        driver.get(base_url)
+        driver.set_script_timeout(max_wait + 10)
+
+        if not wait_for_status_links(driver, load_timeout):
+            print(f"[WARN] No status links appeared within {load_timeout}s.")
+            if "login" in driver.current_url:
+                print("[ERROR] Login failed. Please ensure cookies.txt is valid and exported from a logged-in session.")
 
-    video_urls = set()
+    # Posts harvested so far, and the ones returned, as compact (account, ID) sets
+    seen = StatusStore()
+    found = StatusStore()
+    known_streak = 0
+    past_streak = 0
     last_height = driver.execute_script("return document.body.scrollHeight")
     retries = 0
-    max_retries = 5 
+    stalls = 0
+    # Moving average of how long a scroll takes to bring in new links
+    arrival_time = None
+    throttle_waits = 0
+    scrolls = 0
+    status = "completed"
 
     print(f"[INFO] Starting scan. Use Ctrl+C to stop early.")
     
     try:
 
         while True:
-            # Find all status links directly
-            # The media tab uses grid layout where each item is an anchor tag
-            links = driver.find_elements(By.XPATH, "//a[contains(@href, '/status/')]")
-            print(f"[DEBUG] Found {len(links)} status links in current view.")
+            found_before = len(found)
+            with metrics.phase("extraction", target_username):
+                if capture is not None:
+                    fresh = [
+                        (item["screen_name"] or target_username, item["status_id"], item["media_type"])
+                        for item in capture.poll()
+                    ]
+                    total = capture.items_seen
+                    print(f"[DEBUG] Read {capture.pages} timeline responses ({len(fresh)} new items).")
+                else:
+                    # Collect every status link not harvested yet in a single call.
+                    # The media tab uses grid layout where each item is an anchor tag
+                    links, total, pruned = driver.execute_script(HARVEST_SCRIPT, prune)
+                    fresh = []
+                    for href, media_type in links:
+                        parsed = parse_status_url(href)
+                        if parsed is not None:
+                            fresh.append((*parsed, media_type))
+                    print(f"[DEBUG] Found {total} status links in current view ({len(fresh)} new).")
+                    if pruned:
+                        print(f"[DEBUG] Released {pruned} harvested cells.")
             
-            for link in links:
-                try:
-                    url = link.get_attribute("href")
-                    if url and "/status/" in url:
-                        # Clean URL
-                        clean_url = url.split("?")[0]
-                        # Filter out non-video/analytics noise if needed, 
-                        # but /status/ usually implies a post.
-                        # Sometimes these links might be strictly to the post.
-                        
-                        if clean_url not in video_urls:
-                            video_urls.add(clean_url)
-                            print(f"[FOUND] {clean_url}")
-                            retries = 0 
-                except Exception:
+            for account, status_id, media_type in fresh:
+                # x.com and twitter.com links, and their /photo/N or /video/N
+                # variants, all reduce to the same (account, ID)
+                if not seen.add(account, status_id):
+                    continue
+                retries = 0 
+                if bounds is not None and not bounds.contains(status_id):
+                    # Out of range posts are not indexed, so a later unbounded run still picks them up
+                    past_streak = past_streak + 1 if bounds.is_past(status_id) else 0
+                    continue
+                past_streak = 0
+                clean_url = status_url(account, status_id)
+                if index is not None:
+                    if index.add(target_username, status_id, clean_url):
+                        known_streak = 0
+                        if indexed is not None:
+                            indexed.add(target_username, status_id)
+                    elif incremental:
+                        if indexed is not None and (target_username, status_id) in indexed:
+                            # Indexed by an earlier attempt of this scan, so returned already
+                            known_streak = 0
+                        else:
+                            known_streak += 1
+                        continue
+                if media_types and media_type not in media_types:
                     continue
+                found.add(account, status_id)
+                print(f"[FOUND] {clean_url} ({media_type})")
+                if on_url is not None:
+                    on_url(clean_url, media_type)
 
-            scroll_to_bottom(driver)
-            
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
+            if index is not None:
+                if flush_output is not None and len(found) > found_before:
+                    flush_output()
+                index.commit()
+                if incremental and stop_after_known and known_streak >= stop_after_known:
+                    print(f"[INFO] Reached {known_streak} already indexed posts in a row. Stopping.")
+                    break
+
+            if bounds is not None and stop_after_past and past_streak >= stop_after_past:
+                print(f"[INFO] Reached {past_streak} posts older than the date range in a row. Stopping.")
+                break
+
+            if capture is not None and capture.exhausted:
+                print("[INFO] Reached the end of the timeline.")
+                break
+
+            if max_scrolls is not None and scrolls >= max_scrolls:
+                print(f"[INFO] Reached the limit of {max_scrolls} scrolls. Stopping.")
+                break
+            scrolls += 1
+            if memory is not None and scrolls % memory_every == 0:
+                memory.sample(metrics, target_username, scrolls)
+
+            # This session, or another browser with the same cookies, was rate limited
+            pause = throttle.remaining()
+            if pause:
+                with metrics.phase("throttle_wait", target_username):
+                    time.sleep(pause)
+                driver.execute_script(RETRY_SCRIPT)
+
+            # Wait the full max_wait while retrying, otherwise a few times the
+            # usual arrival time so fast feeds are not held back. Never scroll
+            # faster than the throttle's pace.
+            if retries or arrival_time is None:
+                wait = max_wait
+            else:
+                wait = min(max(arrival_time * 3, min_wait), max_wait)
+            with metrics.phase("scroll", target_username):
+                added, elapsed, loading, error_shown = scroll_to_bottom(
+                    driver, max(min_wait, throttle.pace), max(wait, throttle.pace)
+                )
+                new_height = driver.execute_script("return document.body.scrollHeight")
+            if added:
+                arrival_time = elapsed if arrival_time is None else 0.7 * arrival_time + 0.3 * elapsed
+                throttle.progress()
+                throttle_waits = 0
+            metrics.record_iteration(
+                target_username,
+                links_seen=total,
+                new_urls=len(found) - found_before,
+                height_delta=new_height - last_height,
+                retries=retries,
+                wait=elapsed,
+            )
+            if capture is not None and capture.rate_limited is not None:
+                reset_at, capture.rate_limited = capture.rate_limited, None
+                error_shown = True
+            else:
+                reset_at = None
+            if error_shown and not added:
+                throttle_waits += 1
+                if throttle_waits > max_throttle_waits:
+                    print("[WARN] Still rate limited. Giving up on this scan.")
+                    status = "throttled"
+                    break
+                pause = throttle.hit(reset_at)
+                print(f"[WARN] Rate limited. Backing off for {pause:.0f}s ({throttle_waits}/{max_throttle_waits}), then scrolling every {throttle.pace:.1f}s.")
+                retries = 0
+                continue
+            if new_height == last_height and not added:
+                if loading and stalls < max_retries * 2:
+                    # The spinner is still up, so the request is only slow.
+                    stalls += 1
+                    print("[INFO] Still loading...")
+                    continue
+                if not loading and elapsed >= max_wait:
+                    # A full wait brought nothing and nothing is loading, so this is the end
+                    print("[INFO] No more new content found.")
+                    break
                 retries += 1
                 print(f"[INFO] Loading... ({retries}/{max_retries})")
                 if retries >= max_retries:
@@ -117,15 +637,252 @@ def get_video_urls(driver, target_username):
             else:
                 last_height = new_height
                 retries = 0
+                stalls = 0
                 
     except KeyboardInterrupt:
         print("\n[INFO] Stopped by user command.")
+        status = "interrupted"
     
-    return list(video_urls)
+    metrics.set_urls_found(target_username, len(found))
+    metrics.set_scan_status(target_username, status)
+    # URLs are only rendered now, newest first
+    if status == "throttled":
+        raise ScanThrottled(found.urls())
+    return found.urls()
+
+def scroll_to_bottom(driver, min_wait=0.3, max_wait=4.0, settle=0.25):
+    """Scrolls to the bottom and waits for new status links to be rendered.
+
+    Returns (links_added, seconds_waited, still_loading, error_shown).
+    """
+    added, elapsed, loading, error_shown = driver.execute_async_script(
+        SCROLL_WAIT_SCRIPT, min_wait * 1000, max_wait * 1000, settle * 1000
+    )
+    return added, elapsed / 1000, loading, error_shown
+
+def login_with_cookies(driver, cookies_path):
+    """Loads the cookie session into the browser. Returns False if no login cookie could be set.
+
+    No page is loaded here: the cookies are installed before the first
+    navigation, so the scan can go straight to the media tab.
+    """
+    if not load_netscape_cookies(driver, cookies_path):
+        print("[WARN] No cookies loaded. You might see a login wall.")
+        return False
+
+    # Check Login Status (Simple check)
+    if not has_session(driver):
+        print("[ERROR] No login cookie (auth_token) was loaded. Please ensure cookies.txt is exported from a logged-in session.")
+        return False
+    return True
+
+def open_session(cookies_path, metrics=None, **driver_options):
+    """Starts a browser logged into X.
+
+    A browser profile that already holds a session is used as is, which skips
+    the cookie bootstrap and its page loads.
+    """
+    if metrics is None:
+        metrics = RunMetrics()
+    start = time.perf_counter()
+    with metrics.phase("driver_startup"):
+        driver = setup_driver(**driver_options)
+    try:
+        with metrics.phase("cookie_bootstrap"):
+            if driver_options.get("profile_dir") and has_session(driver):
+                print("[INFO] Reusing the logged-in session from the browser profile.")
+            else:
+                # We don't stop on a failed login, we blindly try just in case, but it likely fails.
+                login_with_cookies(driver, cookies_path)
+    except Exception:
+        driver.quit()
+        raise
+    print(f"[INFO] Browser ready in {time.perf_counter() - start:.2f}s.")
+    return driver
+
+def start_shared_browser(driver_options, workers):
+    """Starts the one Chrome that the workers of the cdp backend open their tabs in.
+
+    Returns None for the selenium backend or a single worker, which get
+    browsers of their own. Otherwise `driver_options` are updated so
+    setup_driver opens a tab in the returned browser, which the caller quits.
+    """
+    if driver_options.get("backend") != "cdp" or workers <= 1:
+        return None
+    options = {k: v for k, v in driver_options.items() if k != "capture_network"}
+    browser = setup_driver(**options)
+    driver_options["cdp_browser"] = browser
+    print(f"[INFO] Driving {workers} workers as tabs of one browser.")
+    return browser
+
+class BrowserSession:
+    """A browser logged in with one of the pool's cookie files.
+
+    When a scan gives up because of rate limiting, the browser is restarted
+    with another cookie file (the one that can scroll soonest) and the
+    account is scanned again. URLs found before the switch are kept.
+    """
+
+    def __init__(self, pool, metrics=None, **driver_options):
+        self.pool = pool
+        self.metrics = metrics
+        self.driver_options = driver_options
+        self.session = None
+        self.driver = None
+        # Whether the last scan ended rate limited
+        self.throttled = False
+
+    def start(self, exclude=()):
+        self.session = self.pool.acquire(exclude)
+        options = dict(self.driver_options)
+        if options.get("profile_dir") and len(self.pool) > 1:
+            # Each cookie file gets its own profile, or a kept session would override it
+            options["profile_dir"] = os.path.join(options["profile_dir"], f"session-{self.session.number}")
+        try:
+            self.driver = open_session(self.session.cookies_path, metrics=self.metrics, **options)
+        except Exception:
+            self.pool.release(self.session)
+            self.session = None
+            raise
+
+    def scan(self, username, **scan_options):
+        """Scans one account, switching cookie files while they are rate limited. Returns its URLs."""
+        found = StatusStore()
+        # Posts indexed by earlier attempts, which must not end a retry as already known
+        indexed = StatusStore()
+        tried = []
+        self.throttled = False
+        while True:
+            if self.driver is None:
+                self.start(exclude=tried)
+            try:
+                urls = get_video_urls(
+                    self.driver, username, metrics=self.metrics,
+                    throttle=self.session.throttle, indexed=indexed, **scan_options
+                )
+            except ScanThrottled as e:
+                for url in e.urls:
+                    found.add_url(url)
+                tried.append(self.session)
+                if len(tried) >= len(self.pool):
+                    print(f"[WARN] {username}: all cookie sessions are rate limited. Results are incomplete.")
+                    self.throttled = True
+                    return found.urls()
+                print(f"[INFO] {username}: switching to another cookie session.")
+                self.quit()
+                continue
+            for url in urls:
+                found.add_url(url)
+            return found.urls()
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+        if self.session is not None:
+            self.pool.release(self.session)
+            self.session = None
+
+def scrape_batch(usernames, pool, workers=1, output_dir="urls", index_path=None,
+                 driver_options=None, metrics=None, **scan_options):
+    """Scrapes several accounts with a pool of browser workers.
+
+    Each worker keeps its browser and cookie session open across accounts and
+    pulls the next username from a shared queue, so a slow account only holds
+    up its own worker. Each account's URLs are written to
+    `output_dir/<username>.txt`. Returns {username: urls}, with None for
+    accounts that failed.
+
+    `pool` is the SessionPool of cookie files to log in with.
+    `driver_options` are passed to `setup_driver`. A `profile_dir` gets one
+    subdirectory per worker, as Chrome cannot share a profile between browsers.
+    With the cdp backend the workers share one browser, each in its own tab.
+    """
+    driver_options = dict(driver_options or {})
+    workers = max(1, min(workers, len(usernames)))
+    shared = start_shared_browser(driver_options, workers)
+    work = queue.Queue()
+    for username in usernames:
+        work.put(username)
+    results = {}
+    stop = threading.Event()
+    os.makedirs(output_dir, exist_ok=True)
+
+    def worker(worker_id):
+        options = dict(driver_options)
+        if options.get("profile_dir") and shared is None:
+            options["profile_dir"] = os.path.join(options["profile_dir"], f"worker-{worker_id}")
+        browser = BrowserSession(pool, metrics=metrics, **options)
+        # SQLite connections cannot be shared between threads
+        index = StatusIndex(index_path) if index_path else None
+        try:
+            while not stop.is_set():
+                try:
+                    username = work.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    urls = browser.scan(username, index=index, **scan_options)
+                    write_urls(os.path.join(output_dir, f"{username}.txt"), urls)
+                    results[username] = urls
+                    if browser.throttled:
+                        print(f"[WARN] [worker {worker_id}] {username}: found {len(urls)} videos before being rate limited.")
+                    else:
+                        print(f"[SUCCESS] [worker {worker_id}] {username}: found {len(urls)} videos.")
+                except Exception as e:
+                    print(f"[ERROR] [worker {worker_id}] {username} failed: {e}")
+                    results[username] = None
+                    # The browser may be in a bad state, start the next account with a fresh one
+                    browser.quit()
+        finally:
+            browser.quit()
+            if index is not None:
+                index.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(i + 1,), daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopped by user command. No new accounts will be started; finishing the ones in progress...")
+        stop.set()
+        # The workers still write to the output and hold their browsers until their scans end
+        for t in threads:
+            t.join()
+    finally:
+        if shared is not None:
+            shared.quit()
+
+    return results
+
+def finish_downloads(pipeline):
+    if pipeline is None:
+        return
+    print("[INFO] Waiting for downloads to finish...")
+    results = pipeline.close()
+    counts = pipeline.summary()
+    print(f"[INFO] Downloads: {counts['done']} done, {counts['failed']} failed, {counts['pending']} not finished.")
+    for url, record in results.items():
+        if record["status"] == "failed":
+            print(f"[WARN] Failed: {url} ({record['error']})")
 
-def scroll_to_bottom(driver, wait_time=2.5):
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(wait_time)
+def write_metrics(metrics, args):
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
+        print(f"[INFO] Metrics written to {args.metrics_json}")
+    if args.metrics_prom:
+        metrics.write_prometheus(args.metrics_prom)
+        print(f"[INFO] Metrics written to {args.metrics_prom}")
 
 def main():
     # Determine the directory where the script/exe is located
@@ -135,16 +892,59 @@ def main():
         application_path = os.path.dirname(os.path.abspath(__file__))
         
     default_cookies_path = os.path.join(application_path, "cookies.txt")
+    default_index_path = os.path.join(application_path, "status_index.db")
+    default_driver_cache = os.path.join(application_path, "chromedriver_cache.json")
 
     parser = argparse.ArgumentParser(description="Scrape X (Twitter) video URLs.")
-    parser.add_argument("username", nargs="?", help="The X username (without @)")
-    parser.add_argument("-c", "--cookies", default=default_cookies_path, help="Path to cookies.txt")
-    parser.add_argument("-o", "--output", default="urls.txt", help="Output file")
+    parser.add_argument("usernames", nargs="*", metavar="username", help="The X username(s) (without @)")
+    parser.add_argument("-c", "--cookies", action="append", help="Path to cookies.txt. Repeat to rotate between sessions when rate limited")
+    parser.add_argument("-o", "--output", default="urls.txt", help="Output file, written as URLs are found. Use - for stdout")
+    parser.add_argument("--flush-every", type=int, default=10, help="URLs written between flushes to disk (default: 10)")
+    parser.add_argument("--sorted", action="store_true", help="Write the output sorted by status ID, oldest first")
+    parser.add_argument("--format", choices=["txt", "jsonl"], default="txt", help="One URL per line (txt) or JSON records with account, ID, media type and discovery time (jsonl). jsonl is always sorted")
+    parser.add_argument("--shards", type=int, default=1, help="Split the sorted output into this many files, e.g. urls.0.txt ... (default: 1)")
+    parser.add_argument("--shard-by", choices=["balanced", "hash"], default="balanced", help="Spread posts evenly over the shards, or pick each post's shard by a hash of its ID (default: balanced)")
+    parser.add_argument("-b", "--batch", help="File with one username per line to scrape in batch mode")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of parallel browsers in batch mode (default: 1)")
+    parser.add_argument("--output-dir", default="urls", help="Directory for per-account output files in batch mode (default: urls)")
+    parser.add_argument("--profile-dir", help="Chrome user-data directory to keep the login session between runs")
+    parser.add_argument("--driver-cache", default=default_driver_cache, help="File caching the resolved chromedriver path")
+    parser.add_argument("--refresh-driver", action="store_true", help="Resolve chromedriver again instead of using the cached one")
+    parser.add_argument("--backend", choices=["selenium", "cdp"], default="selenium", help="Drive Chrome through chromedriver (selenium) or directly over the DevTools protocol (cdp, needs websockets)")
+    parser.add_argument("--lean", action="store_true", help="Do not download images, videos or fonts while scrolling")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a visible window")
+    parser.add_argument("--window-size", type=parse_window_size, help="Browser window size as WIDTHxHEIGHT, e.g. 800x600")
+    parser.add_argument("--prune", action="store_true", help="Release media of harvested posts far above the viewport to keep memory flat")
+    parser.add_argument("--memory-every", type=int, default=0, help="Sample the tab's memory every N scrolls into the metrics, 0 to disable (default: 0)")
+    parser.add_argument("--engine", choices=["dom", "network"], default="dom", help="Read posts from the page (dom) or from the timeline API responses (network)")
+    parser.add_argument("--media", default="video,gif,image", help="Comma-separated media types to output: video, gif, image (default: all)")
+    parser.add_argument("--download", action="store_true", help="Download with yt-dlp while scrolling instead of only writing URLs")
+    parser.add_argument("--download-workers", type=int, default=2, help="Parallel yt-dlp downloads (default: 2)")
+    parser.add_argument("--download-queue", type=int, default=32, help="URLs waiting for download before scrolling pauses (default: 32)")
+    parser.add_argument("--download-attempts", type=int, default=3, help="Attempts per URL before it is reported as failed (default: 3)")
+    parser.add_argument("--yt-dlp-args", default="", help='Extra arguments for yt-dlp, e.g. "-o videos/%%(id)s.%%(ext)s"')
+    parser.add_argument("--metrics-json", help="Write per-phase timings and scroll counters to this JSON file")
+    parser.add_argument("--metrics-prom", help="Write the metrics to this file in Prometheus textfile format")
+    parser.add_argument("--index", help="Path to the status index database (records every URL found)")
+    parser.add_argument("--incremental", action="store_true", help="Only output posts not already in the index and stop early on known ones")
+    parser.add_argument("--stop-after-known", type=int, default=10, help="Known posts in a row before an incremental scan stops (default: 10)")
+    parser.add_argument("--since", type=parse_date, help="Only posts from this date on (YYYY-MM-DD or ISO time, UTC); the scan stops once it passes it")
+    parser.add_argument("--until", type=parse_date, help="Only posts before this date (YYYY-MM-DD or ISO time, UTC)")
+    parser.add_argument("--since-id", type=int, help="Only posts newer than this status ID; the scan stops once it passes it")
+    parser.add_argument("--throttle-waits", type=int, default=2, help="Rate-limit backoffs waited out before a scan gives up or switches cookies (default: 2)")
+    parser.add_argument("--backoff", type=float, default=30.0, help="Seconds to back off after the first rate-limit hit, doubling on each further hit (default: 30)")
+    parser.add_argument("--max-backoff", type=float, default=900.0, help="Longest backoff in seconds (default: 900)")
+    parser.add_argument("--min-wait", type=float, default=0.3, help="Minimum seconds to wait after each scroll (default: 0.3)")
+    parser.add_argument("--max-wait", type=float, default=4.0, help="Maximum seconds to wait for new posts after each scroll (default: 4.0)")
+    parser.add_argument("--max-retries", type=int, default=3, help="Empty scrolls in a row before the scan ends (default: 3)")
     args = parser.parse_args()
     
+    usernames = [u.lstrip('@') for u in args.usernames]
+    if args.batch:
+        usernames += read_usernames(args.batch)
+
     # Interactive mode if no args provided
-    target_user = args.username
-    if not target_user:
+    if not usernames:
         print("=========================================")
         print("      X (Twitter) Video URL Scraper      ")
         print("=========================================")
@@ -152,48 +952,137 @@ def main():
         if not target_user:
             print("No username provided. Exiting.")
             return
+        usernames = [target_user]
+    target_user = usernames[0]
 
     # Check provided path or fallback to CWD if specific arg wasn't absolute?
     # Actually argparse default is absolute now.
     
-    if not os.path.exists(args.cookies):
+    if not args.cookies:
+        args.cookies = [default_cookies_path]
+    for i, cookies_path in enumerate(args.cookies):
+        if os.path.exists(cookies_path):
+            continue
         # Fallback check: look in CWD just in case user expected it there
         cwd_cookie = "cookies.txt"
-        if os.path.exists(cwd_cookie):
-             args.cookies = cwd_cookie
+        if cookies_path == default_cookies_path and os.path.exists(cwd_cookie):
+             args.cookies[i] = cwd_cookie
         else:
-            print(f"[ERROR] Cookie file not found at: {args.cookies}")
+            print(f"[ERROR] Cookie file not found at: {cookies_path}")
             print(f"       (Also checked current directory: {os.getcwd()})")
             print("Please run 'get_cookies.exe' to generate it in the application folder.")
             input("Press Enter to exit...")
             return
+    pool = SessionPool(args.cookies, base_backoff=args.backoff, max_backoff=args.max_backoff)
 
-    driver = setup_driver()
+    if args.incremental and not args.index:
+        args.index = default_index_path
 
-    try:
-        # Navigate to domain first to set cookie context
-        driver.get("https://x.com")
-        time.sleep(2)
-        
-        # Load Cookies
-        if load_netscape_cookies(driver, args.cookies):
-            driver.refresh()
-            time.sleep(3)
-        else:
-            print("[WARN] No cookies loaded. You might see a login wall.")
+    scan_options = dict(
+        incremental=args.incremental,
+        stop_after_known=args.stop_after_known,
+        min_wait=args.min_wait,
+        max_wait=args.max_wait,
+        max_retries=args.max_retries,
+        engine=args.engine,
+        media_types=parse_media_types(args.media),
+        bounds=make_bounds(args.since, args.until, args.since_id),
+        max_throttle_waits=args.throttle_waits,
+        prune=args.prune,
+        memory_every=args.memory_every,
+    )
+    if scan_options["bounds"] is not None:
+        print(f"[INFO] Limiting the scan to posts {scan_options['bounds'].describe()}.")
+    driver_options = dict(
+        driver_cache=args.driver_cache,
+        refresh_driver=args.refresh_driver,
+        profile_dir=args.profile_dir,
+        lean=args.lean,
+        headless=args.headless,
+        window_size=args.window_size,
+        capture_network=args.engine == "network",
+        backend=args.backend,
+    )
 
-        # Check Login Status (Simple check)
-        if "login" in driver.current_url:
-             print("[ERROR] Login failed. Please ensure cookies.txt is valid and exported from a logged-in session.")
-             # We don't exit, we blindly try just in case, but it likely fails.
-        
+    structured = args.sorted or args.format == "jsonl" or args.shards > 1
+    if structured and args.output == "-":
+        print("[ERROR] --sorted, --format jsonl and --shards need an output file, not stdout.")
+        return
+    if args.output == "-":
+        # Keep stdout for URLs only, e.g. for `yt-dlp -a -`
+        sys.stdout = sys.stderr
+    if structured:
+        # Incremental runs add to the sorted files instead of replacing them
+        sink = RecordSink(
+            args.output, fmt=args.format, shards=args.shards, shard_by=args.shard_by,
+            merge=args.incremental, flush_every=args.flush_every,
+        )
+    else:
+        sink = UrlSink(args.output, flush_every=args.flush_every)
+    scan_options["on_url"] = sink.write
+    scan_options["flush_output"] = sink.flush
+    metrics = RunMetrics()
+
+    pipeline = None
+    if args.download:
+        try:
+            downloader = YtDlpDownloader(shlex.split(args.yt_dlp_args))
+        except FileNotFoundError as e:
+            print(f"[ERROR] {e}")
+            return
+        pipeline = DownloadPipeline(
+            downloader,
+            workers=args.download_workers,
+            queue_size=args.download_queue,
+            max_attempts=args.download_attempts,
+        )
+
+        def on_url(url, media_type):
+            # Only posts new to the output are downloaded
+            if sink.write(url, media_type):
+                pipeline.submit(url, media_type)
+        scan_options["on_url"] = on_url
+
+    if args.batch or len(usernames) > 1:
+        print(f"[INFO] Batch mode: {len(usernames)} accounts, {args.workers} worker(s).")
+        try:
+            results = scrape_batch(
+                usernames, pool,
+                workers=args.workers,
+                output_dir=args.output_dir,
+                index_path=args.index,
+                driver_options=driver_options,
+                metrics=metrics,
+                **scan_options,
+            )
+        finally:
+            sink.close()
+            finish_downloads(pipeline)
+            write_metrics(metrics, args)
+        failed = [u for u in usernames if results.get(u) is None]
+        throttled = [u for u in usernames if metrics.scan_status(u) == "throttled" and u not in failed]
+        print(f"\n[SUCCESS] Completed {len(usernames) - len(failed) - len(throttled)}/{len(usernames)} accounts. Found {sink.count} videos.")
+        if throttled:
+            print(f"[WARN] Rate limited, results incomplete: {', '.join(throttled)}")
+        if failed:
+            print(f"[WARN] Failed or not scraped: {', '.join(failed)}")
+        return
+
+    index = None
+    if args.index:
+        index = StatusIndex(args.index)
+        print(f"[INFO] Using status index: {args.index} ({index.count(target_user)} known posts)")
+
+    browser = BrowserSession(pool, metrics=metrics, **driver_options)
+
+    try:
         # Scrape
-        urls = get_video_urls(driver, args.username)
+        urls = browser.scan(target_user, index=index, **scan_options)
         
-        # Export
-        if urls:
-            with open(args.output, "w", encoding="utf-8") as f:
-                f.write("\n".join(urls))
+        # URLs were already written to the output as they were found
+        if browser.throttled:
+            print(f"\n[WARN] Rate limited. Found {len(urls)} videos, but the scan did not reach the end.")
+        elif urls:
             print(f"\n[SUCCESS] Completed. Found {len(urls)} videos.")
         else:
             print("\n[RESULT] No videos found.")
@@ -201,7 +1090,13 @@ def main():
     except Exception as e:
         print(f"[ERROR] Main crashed: {e}")
     finally:
-        driver.quit()
+        sink.close()
+        # The browser is no longer needed while the last downloads finish
+        browser.quit()
+        finish_downloads(pipeline)
+        write_metrics(metrics, args)
+        if index is not None:
+            index.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+# X status IDs are snowflakes: milliseconds since this epoch, shifted left by 22 bits
+TWITTER_EPOCH_MS = 1288834974657
+
+def snowflake_to_datetime(status_id):
+    """Returns the creation time encoded in a status ID (UTC)."""
+    return datetime.fromtimestamp(((status_id >> 22) + TWITTER_EPOCH_MS) / 1000, tz=timezone.utc)
+
+def datetime_to_snowflake(dt):
+    """Returns the smallest status ID that can be created at `dt`."""
+    ms = int(dt.timestamp() * 1000) - TWITTER_EPOCH_MS
+    return max(ms, 0) << 22
+
+def parse_date(value):
+    """Parses a YYYY-MM-DD date or ISO 8601 time. Times without a zone are taken as UTC."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+class ScanBounds:
+    """An ID window for a scan, built from dates and/or a since-ID.
+
+    Dates are turned into snowflake IDs once, so checking a post is a plain
+    integer comparison. Posts from before the first snowflake (2010) have
+    smaller IDs than any snowflake and count as older than any date.
+    """
+
+    def __init__(self, since=None, until=None, since_id=None):
+        # Posts must have min_id <= ID < max_id
+        self.min_id = 0
+        self.max_id = None
+        if since is not None:
+            self.min_id = datetime_to_snowflake(since)
+        if since_id is not None:
+            # Like the API's since_id, the given post itself is excluded
+            self.min_id = max(self.min_id, since_id + 1)
+        if until is not None:
+            self.max_id = datetime_to_snowflake(until)
+
+    def contains(self, status_id):
+        return status_id >= self.min_id and (self.max_id is None or status_id < self.max_id)
+
+    def is_past(self, status_id):
+        """True if the post is older than the window, i.e. the scan went past it."""
+        return status_id < self.min_id
+
+    def describe(self):
+        parts = []
+        if self.min_id:
+            parts.append(f"from {snowflake_to_datetime(self.min_id):%Y-%m-%d %H:%M} (ID {self.min_id})")
+        if self.max_id is not None:
+            parts.append(f"before {snowflake_to_datetime(self.max_id):%Y-%m-%d %H:%M} (ID {self.max_id})")
+        return ", ".join(parts)
+
+def make_bounds(since=None, until=None, since_id=None):
+    """Builds ScanBounds from the --since/--until/--since-id options, or None if none were given."""
+    if since is None and until is None and since_id is None:
+        return None
+    return ScanBounds(since=since, until=until, since_id=since_id)
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import time
+
+class StatusIndex:
+    """Persistent SQLite index of status IDs already seen, keyed by account."""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Batch workers each open their own connection to the same file
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS statuses ("
+            " account TEXT NOT NULL,"
+            " status_id INTEGER NOT NULL,"
+            " url TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " PRIMARY KEY (account, status_id)"
+            ") WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def add(self, account, status_id, url):
+        """Records a status. Returns True if it was not in the index yet."""
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO statuses (account, status_id, url, first_seen) VALUES (?, ?, ?, ?)",
+            (account.lower(), status_id, url, time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def count(self, account):
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM statuses WHERE account = ?", (account.lower(),)
+        ).fetchone()
+        return row[0]
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,99 @@
+import re
+import heapq
+from array import array
+from bisect import bisect_left
+
+from timeline_json import status_url
+
+# Matches x.com, twitter.com, mobile/www variants, other hosts (such as the
+# benchmark server) and relative links, with or without /photo/N, /video/N,
+# /analytics or query string suffixes.
+STATUS_URL_RE = re.compile(r"^(?:[a-z]+://[^/]+)?/(i/web|[A-Za-z0-9_]+)/status(?:es)?/(\d+)", re.IGNORECASE)
+
+def parse_status_url(url):
+    """Reduces a status link to (account, status_id), or None if it is not one."""
+    match = STATUS_URL_RE.match(url)
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+def normalize_status_url(url):
+    """Returns the canonical https://x.com/<account>/status/<id> form of a status link."""
+    parsed = parse_status_url(url)
+    if parsed is None:
+        return None
+    return status_url(*parsed)
+
+class StatusStore:
+    """Compact set of (account, status ID) pairs.
+
+    Accounts are interned once and each account's IDs are kept as 64-bit
+    integers in a sorted array, so a post costs 8 bytes instead of a URL
+    string. New IDs collect in a small buffer that is merged into the array
+    once it grows past `merge_threshold`. Accounts compare case-insensitively.
+    """
+
+    def __init__(self, merge_threshold=1024):
+        self.merge_threshold = merge_threshold
+        # lowercased account -> account as first seen
+        self.accounts = {}
+        # lowercased account -> sorted array('Q') of merged IDs
+        self.ids = {}
+        # lowercased account -> set of IDs not merged yet
+        self.pending = {}
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, item):
+        account, status_id = item
+        key = account.lower()
+        if key not in self.accounts:
+            return False
+        if status_id in self.pending[key]:
+            return True
+        ids = self.ids[key]
+        i = bisect_left(ids, status_id)
+        return i < len(ids) and ids[i] == status_id
+
+    def add(self, account, status_id):
+        """Adds a post. Returns True if it was not in the store yet."""
+        key = account.lower()
+        if key not in self.accounts:
+            self.accounts[key] = account
+            self.ids[key] = array('Q')
+            self.pending[key] = set()
+        elif (account, status_id) in self:
+            return False
+
+        pending = self.pending[key]
+        pending.add(status_id)
+        self.count += 1
+        if len(pending) >= self.merge_threshold:
+            self.merge(key)
+        return True
+
+    def merge(self, key):
+        pending = self.pending[key]
+        if pending:
+            self.ids[key] = array('Q', heapq.merge(self.ids[key], sorted(pending)))
+            pending.clear()
+
+    def add_url(self, url):
+        """Adds a post by its URL. Returns True if it was new, None if the URL is not a status link."""
+        parsed = parse_status_url(url)
+        if parsed is None:
+            return None
+        return self.add(*parsed)
+
+    def items(self):
+        """Yields (account, status_id) pairs, newest first within each account."""
+        for key, account in self.accounts.items():
+            self.merge(key)
+            for status_id in reversed(self.ids[key]):
+                yield account, status_id
+
+    def urls(self):
+        """Renders the stored posts as status URLs, newest first within each account."""
+        return [status_url(account, status_id) for account, status_id in self.items()]
@@ -0,0 +1,18 @@
+import os
+import sys
+import json
+
+import pytest
+
+# The scripts are plain top-level modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+@pytest.fixture
+def load_fixture():
+    """Returns the parsed JSON of a file in tests/fixtures."""
+    def load(name):
+        with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+            return json.load(f)
+    return load
@@ -0,0 +1,154 @@
+import sys
+import json
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+import http_engine
+from http_engine import TimelineClient, fetch_video_urls
+from snowflake import ScanBounds
+
+PAGE1_CURSOR = "DAABCgABGNvZ-PAGE2"
+PAGE2_CURSOR = "DAABCgABGNvZ-PAGE3"
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers UserByScreenName and UserMedia like the GraphQL API.
+
+    Only the bearer header is checked: the session's cookies belong to
+    .x.com, so requests never send them to 127.0.0.1.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = urllib.parse.urlparse(self.path)
+        operation = url.path.rsplit("/", 1)[-1]
+        variables = json.loads(urllib.parse.parse_qs(url.query)["variables"][0])
+        server.requests.append((operation, variables.get("cursor")))
+        if not self.headers.get("authorization", "").startswith("Bearer "):
+            self.reply(401, {"errors": [{"message": "Unauthorized"}]})
+        elif operation == "UserByScreenName":
+            self.reply(200, {"data": {"user": {"result": {"rest_id": "42"}}}})
+        elif operation == "UserMedia":
+            if server.rate_limits:
+                reset = server.rate_limits.pop(0)
+                self.reply(429, {"errors": [{"message": "Rate limit exceeded"}]}, {"x-rate-limit-reset": str(reset)})
+                return
+            self.reply(200, server.pages[variables.get("cursor")])
+        else:
+            self.reply(404, {})
+
+    def reply(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def stand_in(load_fixture):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.requests = []
+    server.rate_limits = []
+    server.pages = {
+        None: load_fixture("user_media_page1.json"),
+        PAGE1_CURSOR: load_fixture("user_media_page2.json"),
+        PAGE2_CURSOR: load_fixture("user_media_empty.json"),
+    }
+    server.api_base = f"http://127.0.0.1:{server.server_address[1]}/i/api"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+COOKIES = [
+    {"name": "ct0", "value": "csrf", "domain": ".x.com", "path": "/"},
+    {"name": "auth_token", "value": "token", "domain": ".x.com", "path": "/"},
+]
+
+def make_client(stand_in, **kwargs):
+    return TimelineClient(COOKIES, api_base=stand_in.api_base, **kwargs)
+
+def ids(urls):
+    return [int(url.rsplit("/", 1)[1]) for url in urls]
+
+def test_follows_the_cursor_until_an_empty_page(stand_in):
+    urls = fetch_video_urls(make_client(stand_in), "alice")
+    assert ids(urls) == [
+        1790000000000000100, 1790000000000000099, 1790000000000000098,
+        1790000000000000097, 1790000000000000096, 1790000000000000095,
+    ]
+    assert stand_in.requests == [
+        ("UserByScreenName", None),
+        ("UserMedia", None),
+        ("UserMedia", PAGE1_CURSOR),
+        ("UserMedia", PAGE2_CURSOR),
+    ]
+
+def test_stops_on_a_repeated_cursor(stand_in):
+    # The last page points back at itself
+    stand_in.pages[PAGE2_CURSOR] = stand_in.pages[PAGE1_CURSOR]
+    urls = fetch_video_urls(make_client(stand_in), "alice")
+    assert len(urls) == 6
+    assert [cursor for _, cursor in stand_in.requests[1:]] == [None, PAGE1_CURSOR, PAGE2_CURSOR]
+
+def test_media_filter(stand_in):
+    found = []
+    urls = fetch_video_urls(make_client(stand_in), "alice", media_types={"gif"},
+                            on_url=lambda url, media_type: found.append(media_type))
+    assert ids(urls) == [1790000000000000099, 1790000000000000097]
+    assert found == ["gif", "gif"]
+
+def test_bounds_skip_newer_posts_and_stop_early(stand_in):
+    bounds = ScanBounds(since_id=1790000000000000097)
+    bounds.max_id = 1790000000000000100
+    urls = fetch_video_urls(make_client(stand_in), "alice", bounds=bounds, stop_after_past=2)
+    assert ids(urls) == [1790000000000000099, 1790000000000000098]
+    # The two posts older than the range end the scan before the last page
+    assert [cursor for _, cursor in stand_in.requests[1:]] == [None, PAGE1_CURSOR]
+
+def test_waits_for_the_rate_limit_reset(stand_in, monkeypatch):
+    now = 1_800_000_000
+    waits = []
+    monkeypatch.setattr(http_engine.time, "time", lambda: now)
+    monkeypatch.setattr(http_engine.time, "sleep", waits.append)
+    stand_in.rate_limits = [now + 60]
+    urls = fetch_video_urls(make_client(stand_in), "alice")
+    assert len(urls) == 6
+    assert waits == [60]
+    assert [cursor for _, cursor in stand_in.requests[1:3]] == [None, None]
+
+def test_gives_up_when_the_reset_is_too_far(stand_in, monkeypatch):
+    now = 1_800_000_000
+    monkeypatch.setattr(http_engine.time, "time", lambda: now)
+    monkeypatch.setattr(http_engine.time, "sleep", lambda seconds: pytest.fail("should not wait"))
+    stand_in.rate_limits = [now + 3600]
+    with pytest.raises(requests.HTTPError):
+        fetch_video_urls(make_client(stand_in, max_rate_limit_wait=900), "alice")
+
+def test_cli_against_the_stand_in(stand_in, tmp_path, monkeypatch):
+    cookies = tmp_path / "cookies.txt"
+    cookies.write_text(
+        "# Netscape HTTP Cookie File\n"
+        ".x.com\tTRUE\t/\tTRUE\t2000000000\tct0\tcsrf\n"
+        ".x.com\tTRUE\t/\tTRUE\t2000000000\tauth_token\ttoken\n",
+        encoding="utf-8",
+    )
+    output = tmp_path / "urls.txt"
+    monkeypatch.setattr(sys, "argv", [
+        "http_engine.py", "alice", "-c", str(cookies), "-o", str(output),
+        "--api-base", stand_in.api_base, "--media", "video", "--sorted",
+    ])
+    http_engine.main()
+    assert output.read_text(encoding="utf-8").split() == [
+        "https://x.com/alice/status/1790000000000000096",
+        "https://x.com/alice/status/1790000000000000100",
+    ]
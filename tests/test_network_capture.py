@@ -0,0 +1,76 @@
+import json
+
+from scraper import NetworkCapture
+
+TIMELINE_URL = "https://x.com/i/api/graphql/abc/UserMedia?variables=%7B%7D"
+
+def log_entry(method, params):
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+def response(request_id, url=TIMELINE_URL, status=200, headers=None):
+    return log_entry("Network.responseReceived", {
+        "requestId": request_id,
+        "response": {"url": url, "status": status, "headers": headers or {}},
+    })
+
+def finished(request_id):
+    return log_entry("Network.loadingFinished", {"requestId": request_id})
+
+class FakeDriver:
+    """Serves queued performance log batches and recorded response bodies."""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.logs = []
+
+    def get_log(self, log_type):
+        assert log_type == "performance"
+        return self.logs.pop(0) if self.logs else []
+
+    def execute_cdp_cmd(self, cmd, args):
+        assert cmd == "Network.getResponseBody"
+        return {"body": json.dumps(self.bodies[args["requestId"]]), "base64Encoded": False}
+
+def test_poll_reads_finished_timeline_responses(load_fixture):
+    driver = FakeDriver({"1": load_fixture("user_media_page1.json"), "2": load_fixture("user_media_page2.json")})
+    capture = NetworkCapture(driver)
+    driver.logs = [
+        # The second page is still loading at the first poll
+        [response("1"), response("other", url="https://x.com/i/api/graphql/abc/UserByScreenName"),
+         finished("1"), finished("other"), response("2")],
+        [finished("2")],
+    ]
+    first = capture.poll()
+    assert [item["status_id"] for item in first] == [
+        1790000000000000100, 1790000000000000099, 1790000000000000098,
+    ]
+    assert capture.cursor == "DAABCgABGNvZ-PAGE2"
+    second = capture.poll()
+    assert len(second) == 3
+    assert capture.pages == 2
+    assert capture.items_seen == 6
+    assert capture.cursor == "DAABCgABGNvZ-PAGE3"
+    assert not capture.exhausted
+
+def test_empty_page_marks_the_timeline_exhausted(load_fixture):
+    driver = FakeDriver({"3": load_fixture("user_media_empty.json")})
+    capture = NetworkCapture(driver)
+    driver.logs = [[response("3"), finished("3")]]
+    assert capture.poll() == []
+    assert capture.exhausted
+
+def test_rate_limited_response(load_fixture):
+    driver = FakeDriver({})
+    capture = NetworkCapture(driver)
+    driver.logs = [[response("4", status=429, headers={"X-Rate-Limit-Reset": "1790000000"}), finished("4")]]
+    assert capture.poll() == []
+    assert capture.rate_limited == 1790000000.0
+    assert capture.pages == 0
+    assert not capture.exhausted
+
+def test_drain_discards_earlier_entries(load_fixture):
+    driver = FakeDriver({"1": load_fixture("user_media_page1.json")})
+    capture = NetworkCapture(driver)
+    driver.logs = [[response("1")], [finished("1")]]
+    capture.drain()
+    assert capture.poll() == []
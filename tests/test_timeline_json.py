@@ -0,0 +1,66 @@
+import pytest
+
+from timeline_json import parse_timeline, parse_media_types, status_url
+
+def test_first_page(load_fixture):
+    items, cursors = parse_timeline(load_fixture("user_media_page1.json"))
+    assert [item["status_id"] for item in items] == [
+        1790000000000000100, 1790000000000000099, 1790000000000000098,
+    ]
+    assert cursors == {"Top": "DAABCgABGNvZ-TOP", "Bottom": "DAABCgABGNvZ-PAGE2"}
+
+def test_module_page(load_fixture):
+    items, cursors = parse_timeline(load_fixture("user_media_page2.json"))
+    assert [item["status_id"] for item in items] == [
+        1790000000000000097, 1790000000000000096, 1790000000000000095,
+    ]
+    assert cursors["Bottom"] == "DAABCgABGNvZ-PAGE3"
+
+def test_visibility_results_are_unwrapped(load_fixture):
+    items, _ = parse_timeline(load_fixture("user_media_page1.json"))
+    item = next(item for item in items if item["status_id"] == 1790000000000000099)
+    assert item["screen_name"] == "alice"
+    assert item["media_type"] == "gif"
+
+def test_quoted_and_retweeted_tweets_are_skipped(load_fixture):
+    ids = set()
+    for name in ("user_media_page1.json", "user_media_page2.json"):
+        items, _ = parse_timeline(load_fixture(name))
+        ids.update(item["status_id"] for item in items)
+    assert 1790000000000000900 not in ids
+    assert 1790000000000000901 not in ids
+    assert {1790000000000000100, 1790000000000000096} <= ids
+
+def test_screen_name_from_old_and_new_layout(load_fixture):
+    items, _ = parse_timeline(load_fixture("user_media_page1.json"))
+    assert {item["screen_name"] for item in items} == {"alice"}
+
+def test_media_types(load_fixture):
+    types = {}
+    for name in ("user_media_page1.json", "user_media_page2.json"):
+        items, _ = parse_timeline(load_fixture(name))
+        types.update((item["status_id"], item["media_type"]) for item in items)
+    assert types == {
+        1790000000000000100: "video",
+        # A gif wins over photos in the same post
+        1790000000000000099: "gif",
+        1790000000000000098: "image",
+        1790000000000000097: "gif",
+        1790000000000000096: "video",
+        1790000000000000095: None,
+    }
+
+def test_empty_page_keeps_bottom_cursor(load_fixture):
+    items, cursors = parse_timeline(load_fixture("user_media_empty.json"))
+    assert items == []
+    assert cursors["Bottom"] == "DAABCgABGNvZ-PAGE3"
+
+def test_parse_media_types():
+    assert parse_media_types("video, GIF") == {"video", "gif"}
+    assert parse_media_types("video,gif,image") is None
+    with pytest.raises(SystemExit):
+        parse_media_types("audio")
+
+def test_status_url():
+    assert status_url("alice", 5) == "https://x.com/alice/status/5"
+    assert status_url(None, 5) == "https://x.com/i/web/status/5"
@@ -0,0 +1,114 @@
+import json
+import pathlib
+
+import pytest
+
+import url_files
+from url_files import RecordSink, UrlSink, merge_sorted, post_record, shard_paths
+
+def url(status_id, account="alice"):
+    return f"https://x.com/{account}/status/{status_id}"
+
+def lines(path):
+    return path.read_text(encoding="utf-8").splitlines()
+
+def kill(sink):
+    """Leaves the sink's .partial file behind, as a killed run would."""
+    sink.flush()
+    sink.file.close()
+
+def test_url_sink_skips_duplicate_posts(tmp_path):
+    output = tmp_path / "urls.txt"
+    sink = UrlSink(str(output))
+    assert sink.write(url(1))
+    assert not sink.write("https://twitter.com/alice/status/1/video/1")
+    assert sink.write(url(2))
+    sink.close()
+    assert lines(output) == [url(1), url(2)]
+    assert sink.count == 2
+
+def test_post_record():
+    record = post_record("alice", 1790000000000000100, url(1790000000000000100), "gif")
+    assert record["status_id"] == "1790000000000000100"
+    assert set(record) == {"account", "status_id", "url", "media_type", "discovered_at"}
+
+def test_record_sink_writes_sorted(tmp_path):
+    output = tmp_path / "urls.txt"
+    sink = RecordSink(str(output))
+    for status_id in (30, 10, 20):
+        sink.write(url(status_id))
+    sink.close()
+    assert lines(output) == [url(10), url(20), url(30)]
+    assert not (tmp_path / "urls.txt.partial").exists()
+
+@pytest.mark.parametrize("merge", [False, True])
+def test_posts_of_a_killed_run_are_recovered(tmp_path, merge):
+    output = tmp_path / "urls.txt"
+    kill_sink = RecordSink(str(output), merge=merge)
+    kill_sink.write(url(10))
+    kill_sink.write(url(20))
+    kill(kill_sink)
+
+    sink = RecordSink(str(output), merge=merge)
+    sink.write(url(30))
+    # Found again by this run
+    sink.write(url(20))
+    sink.close()
+    assert lines(output) == [url(10), url(20), url(30)]
+
+def test_recovered_posts_survive_a_second_crash(tmp_path):
+    output = tmp_path / "posts.jsonl"
+    sink = RecordSink(str(output), fmt="jsonl")
+    sink.write(url(10), "video")
+    kill(sink)
+    # The crash cut the last line off
+    with open(f"{output}.partial", "a", encoding="utf-8") as f:
+        f.write('{"account": "alice", "stat')
+
+    kill(RecordSink(str(output), fmt="jsonl"))
+    sink = RecordSink(str(output), fmt="jsonl")
+    sink.write(url(20), "gif")
+    sink.close()
+    records = [json.loads(line) for line in lines(output)]
+    assert [(r["status_id"], r["media_type"]) for r in records] == [("10", "video"), ("20", "gif")]
+
+def test_incremental_balanced_shards_are_not_read(tmp_path, monkeypatch):
+    output = tmp_path / "posts.jsonl"
+    sink = RecordSink(str(output), fmt="jsonl", shards=3, merge=True)
+    for status_id in range(100, 110):
+        sink.write(url(status_id))
+    sink.close()
+
+    reads = []
+    read_keyed_lines = url_files.read_keyed_lines
+    monkeypatch.setattr(url_files, "read_keyed_lines", lambda path: reads.append(path) or read_keyed_lines(path))
+    sink = RecordSink(str(output), fmt="jsonl", shards=3, merge=True)
+    for status_id in range(200, 205):
+        sink.write(url(status_id))
+    sink.close()
+    assert reads == []
+    assert [len(lines(pathlib.Path(path))) for path in shard_paths(str(output), 3)] == [5, 5, 5]
+
+def test_balanced_shards_skip_posts_they_already_hold(tmp_path):
+    output = tmp_path / "urls.txt"
+    sink = RecordSink(str(output), shards=2, merge=True)
+    for status_id in (10, 20, 30, 40):
+        sink.write(url(status_id))
+    sink.close()
+
+    sink = RecordSink(str(output), shards=2, merge=True)
+    for status_id in (20, 25):
+        sink.write(url(status_id))
+    sink.close()
+    shards = [lines(tmp_path / f"urls.{i}.txt") for i in range(2)]
+    assert sorted(len(shard) for shard in shards) == [2, 3]
+    assert sorted(u for shard in shards for u in shard) == sorted(url(i) for i in (10, 20, 25, 30, 40))
+    for shard in shards:
+        assert shard == sorted(shard, key=lambda u: int(u.rsplit("/", 1)[1]))
+
+def test_merge_sorted(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text(f"{url(10)}\n{url(30)}\n", encoding="utf-8")
+    assert merge_sorted(str(path), [(20, url(20)), (30, url(30))]) == 1
+    assert merge_sorted(str(path), [(40, url(40))]) == 1
+    assert lines(path) == [url(10), url(20), url(30), url(40)]
@@ -0,0 +1,97 @@
+import time
+import threading
+
+class ScanThrottled(Exception):
+    """Raised when a scan gives up because X keeps rate limiting it. Holds the URLs found so far."""
+
+    def __init__(self, urls):
+        super().__init__("rate limited")
+        self.urls = urls
+
+class Throttle:
+    """Backoff and scroll pacing for one cookie session.
+
+    Every rate-limit hit doubles the backoff (or waits until the reset time
+    X sent) and slows scrolling down. After a stretch of scrolls without a
+    hit, both relax again. The state is shared by all browsers using the
+    same cookies, since X limits the account, not the browser.
+    """
+
+    def __init__(self, base_backoff=30.0, max_backoff=900.0, max_pace=10.0, calm_scrolls=20):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_pace = max_pace
+        self.calm_scrolls = calm_scrolls
+        self.lock = threading.Lock()
+        self.backoff = 0.0
+        # Minimum seconds per scroll
+        self.pace = 0.0
+        self.cooldown_until = 0.0
+        self.events = 0
+        self.calm = 0
+
+    def hit(self, reset_at=None):
+        """Records a rate-limit hit. Returns the seconds to wait before scrolling again."""
+        with self.lock:
+            now = time.time()
+            self.events += 1
+            self.calm = 0
+            self.backoff = min(self.backoff * 2 if self.backoff else self.base_backoff, self.max_backoff)
+            wait = self.backoff
+            if reset_at:
+                wait = min(max(reset_at - now + 1, 1), self.max_backoff)
+            self.pace = min(max(self.pace * 1.5, 1.0), self.max_pace)
+            self.cooldown_until = max(self.cooldown_until, now + wait)
+            return wait
+
+    def progress(self):
+        """Records a scroll that brought in posts."""
+        with self.lock:
+            self.calm += 1
+            if self.calm < self.calm_scrolls:
+                return
+            self.calm = 0
+            self.backoff /= 2
+            self.pace = self.pace * 0.8 if self.pace > 0.1 else 0.0
+
+    def remaining(self):
+        """Seconds left until the session may scroll again."""
+        return max(0.0, self.cooldown_until - time.time())
+
+class CookieSession:
+    def __init__(self, number, cookies_path, throttle):
+        self.number = number
+        self.cookies_path = cookies_path
+        self.throttle = throttle
+        # Browsers currently logged in with this session
+        self.users = 0
+
+class SessionPool:
+    """Cookie files to rotate between when one of them gets rate limited."""
+
+    def __init__(self, cookie_paths, **throttle_options):
+        self.sessions = [
+            CookieSession(i + 1, path, Throttle(**throttle_options))
+            for i, path in enumerate(cookie_paths)
+        ]
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def acquire(self, exclude=()):
+        """Claims the session that can scroll soonest and has the fewest browsers.
+
+        Returns None if all sessions are excluded.
+        """
+        with self.lock:
+            candidates = [s for s in self.sessions if s not in exclude]
+            if not candidates:
+                return None
+            session = min(candidates, key=lambda s: (s.throttle.remaining(), s.users))
+            session.users += 1
+            return session
+
+    def release(self, session):
+        with self.lock:
+            session.users -= 1
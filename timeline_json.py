@@ -0,0 +1,102 @@
+import sys
+import json
+
+# Tweets nested under these keys belong to other posts (quotes, retweets)
+SKIPPED_KEYS = ("quoted_status_result", "retweeted_status_result")
+
+MEDIA_TYPES = {
+    "video": "video",
+    "animated_gif": "gif",
+    "photo": "image",
+}
+
+def parse_media_types(value):
+    """Parses a comma-separated --media option. Returns None when every type is wanted."""
+    wanted = {t.strip().lower() for t in value.split(",") if t.strip()}
+    known = set(MEDIA_TYPES.values())
+    unknown = wanted - known
+    if unknown:
+        raise SystemExit(f"[ERROR] Unknown media type(s): {', '.join(sorted(unknown))}")
+    if wanted >= known:
+        return None
+    return wanted
+
+def unwrap_tweet(result):
+    """Returns the tweet inside a tweet_results.result object."""
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        return result.get("tweet") or {}
+    return result
+
+def tweet_screen_name(tweet):
+    user = tweet.get("core", {}).get("user_results", {}).get("result", {})
+    # Newer payloads moved screen_name from "legacy" to "core"
+    return (user.get("core", {}).get("screen_name")
+            or user.get("legacy", {}).get("screen_name"))
+
+def tweet_media_type(tweet):
+    """Classifies a tweet as "video", "gif" or "image", or None without media."""
+    legacy = tweet.get("legacy", {})
+    media = legacy.get("extended_entities", {}).get("media") or legacy.get("entities", {}).get("media") or []
+    types = {MEDIA_TYPES.get(m.get("type")) for m in media}
+    for media_type in ("video", "gif", "image"):
+        if media_type in types:
+            return media_type
+    return None
+
+def walk(node, tweets, cursors):
+    if isinstance(node, list):
+        for child in node:
+            walk(child, tweets, cursors)
+        return
+    if not isinstance(node, dict):
+        return
+
+    if "tweet_results" in node:
+        tweet = unwrap_tweet(node["tweet_results"].get("result") or {})
+        if tweet.get("rest_id"):
+            tweets.append(tweet)
+        return
+    if "cursorType" in node and "value" in node:
+        cursors[node["cursorType"]] = node["value"]
+        return
+
+    for key, child in node.items():
+        if key not in SKIPPED_KEYS:
+            walk(child, tweets, cursors)
+
+def parse_timeline(payload):
+    """Extracts media items and pagination cursors from a timeline API response.
+
+    Returns (items, cursors). Each item is a dict with "status_id",
+    "screen_name" and "media_type"; cursors maps cursor types such as
+    "Bottom" to their values. The payload layout is walked generically, as X
+    changes the exact nesting from time to time.
+    """
+    tweets = []
+    cursors = {}
+    walk(payload, tweets, cursors)
+
+    items = []
+    for tweet in tweets:
+        items.append({
+            "status_id": int(tweet["rest_id"]),
+            "screen_name": tweet_screen_name(tweet),
+            "media_type": tweet_media_type(tweet),
+        })
+    return items, cursors
+
+def status_url(screen_name, status_id):
+    # x.com/i/web/status/<id> resolves to the post when the author is unknown
+    return f"https://x.com/{screen_name or 'i/web'}/status/{status_id}"
+
+def main():
+    # Prints the status URLs in recorded timeline responses, for checking the parser offline.
+    for path in sys.argv[1:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            items, cursors = parse_timeline(json.load(f))
+        for item in items:
+            print(f"{status_url(item['screen_name'], item['status_id'])}\t{item['media_type']}")
+        print(f"[INFO] {path}: {len(items)} items, cursors: {', '.join(cursors) or 'none'}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
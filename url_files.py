@@ -0,0 +1,325 @@
+import os
+import sys
+import json
+import time
+import heapq
+import threading
+
+from status_store import StatusStore, parse_status_url
+
+# Multiplier of the shard hash. Snowflake IDs mostly end in zero bits, so
+# `id % shards` would leave some shards nearly empty.
+SHARD_HASH = 0x9E3779B97F4A7C15
+
+def read_usernames(filepath):
+    """Reads one username per line, ignoring blank lines, comments and a leading @."""
+    usernames = []
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            usernames.append(line.lstrip('@'))
+    return usernames
+
+def post_record(account, status_id, url, media_type):
+    """Returns the JSONL record of a post, as written by RecordSink and watch.py."""
+    return {
+        "account": account,
+        # IDs are written as strings, as they do not fit a JavaScript number
+        "status_id": str(status_id),
+        "url": url,
+        "media_type": media_type,
+        "discovered_at": time.time(),
+    }
+
+def write_urls(filepath, urls):
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write("\n".join(urls))
+
+class UrlSink:
+    """Writes URLs to a file as they are found, so a crash loses at most one batch.
+
+    Lines are flushed and fsynced every `flush_every` URLs or `flush_interval`
+    seconds. A path of "-" writes to stdout and flushes every line, so a
+    downloader reading from a pipe can start right away. Duplicate posts are
+    skipped, including other URL variants of the same post, and writes from
+    several threads are safe.
+    """
+
+    def __init__(self, path, flush_every=10, flush_interval=2.0):
+        self.path = path
+        self.flush_every = 1 if path == "-" else flush_every
+        self.flush_interval = flush_interval
+        if path == "-":
+            # sys.stdout may be redirected to stderr to keep log lines off the pipe
+            self.file = sys.__stdout__
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.seen = StatusStore()
+        # URLs that are not status links are deduplicated as plain strings
+        self.seen_other = set()
+        self.count = 0
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, url, media_type=None):
+        """Writes a URL unless it was already written. Returns True if it was new."""
+        with self.lock:
+            new = self.seen.add_url(url)
+            if new is None:
+                new = url not in self.seen_other
+                self.seen_other.add(url)
+            if not new:
+                return False
+            self.file.write(self.format_line(url, media_type) + "\n")
+            self.count += 1
+            self.unflushed += 1
+            if self.unflushed >= self.flush_every or time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+            return True
+
+    def format_line(self, url, media_type):
+        return url
+
+    def _flush(self):
+        self.file.flush()
+        if self.path != "-":
+            os.fsync(self.file.fileno())
+        self.unflushed = 0
+        self.last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            if self.path != "-":
+                self.file.close()
+
+def shard_paths(path, shards):
+    """Returns the output file names: `path` itself, or urls.0.txt, urls.1.txt, ... for several shards."""
+    if shards <= 1:
+        return [path]
+    stem, ext = os.path.splitext(path)
+    return [f"{stem}.{i}{ext}" for i in range(shards)]
+
+def hash_shard(status_id, shards):
+    """Picks a post's shard from its ID alone, so it lands in the same shard on every run."""
+    return (((status_id * SHARD_HASH) & 0xFFFFFFFFFFFFFFFF) >> 32) % shards
+
+def line_key(line):
+    """Returns the status ID of an output line, either a URL or a JSONL record."""
+    if line.startswith("{"):
+        return int(json.loads(line)["status_id"])
+    parsed = parse_status_url(line)
+    return parsed[1] if parsed else 0
+
+def read_keyed_lines(path):
+    """Yields (status_id, line) for the lines of an output file, if it exists."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                yield line_key(line), line
+
+def last_key(path):
+    """Returns the status ID of the last line of a file, reading only its end. None if it is empty."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        lines = f.read().decode("utf-8", errors="replace").splitlines()
+    lines = [line for line in lines if line.strip()]
+    return line_key(lines[-1]) if lines else None
+
+def count_lines(path):
+    """Counts the lines of a file without parsing them. 0 if it does not exist."""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+    return count
+
+def merge_sorted(path, items):
+    """Merges (status_id, line) pairs, sorted by ID, into a file sorted the same way.
+
+    Posts already in the file are kept as they are. When every new post is
+    newer than the file's last line, as after an incremental run, the lines
+    are simply appended; otherwise the file is rewritten in one merge pass.
+    Returns the number of lines added.
+    """
+    if not items:
+        return 0
+    last = last_key(path)
+    if last is None or items[0][0] > last:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for _, line in items))
+        return len(items)
+
+    added = 0
+    previous = None
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        # Existing lines come first among equal IDs, so they win over the new ones
+        merged = heapq.merge(
+            ((key, 0, line) for key, line in read_keyed_lines(path)),
+            ((key, 1, line) for key, line in items),
+        )
+        for key, source, line in merged:
+            if key == previous:
+                continue
+            previous = key
+            added += source
+            f.write(line + "\n")
+    os.replace(tmp_path, path)
+    return added
+
+class RecordSink(UrlSink):
+    """UrlSink for sorted, optionally sharded output.
+
+    While scanning, lines are streamed to `<path>.partial` as usual, so
+    nothing is lost on a crash: the posts of a `.partial` file left by a run
+    that was killed are carried over into this run's output. close() then
+    writes the lines sorted by status ID (oldest first) to `path`, or spread
+    over `shards` files. Shards are either balanced by count or picked by a
+    hash of the ID. With `merge`, the posts are merged into the existing
+    files instead of replacing them.
+
+    `fmt` is "txt" for one URL per line, or "jsonl" for records with the
+    account, status ID, URL, media type and discovery time.
+    """
+
+    def __init__(self, path, fmt="txt", shards=1, shard_by="balanced", merge=False, **kwargs):
+        self.final_path = path
+        self.fmt = fmt
+        self.shards = max(1, shards)
+        self.shard_by = shard_by
+        self.merge = merge
+        # Line counts of the balanced shards, so appending does not read them
+        self.sizes_path = f"{path}.sizes.json"
+        recovered = self.recover(f"{path}.partial")
+        super().__init__(f"{path}.partial", **kwargs)
+        # (status_id, line) of every post written
+        self.items = recovered
+        if recovered:
+            # Kept in the new .partial file too, in case this run is killed as well
+            self.file.write("".join(line + "\n" for _, line in recovered))
+            self._flush()
+
+    def format_line(self, url, media_type):
+        parsed = parse_status_url(url)
+        if self.fmt == "jsonl" and parsed is not None:
+            line = json.dumps(post_record(*parsed, url, media_type))
+        else:
+            line = url
+        if parsed is not None:
+            self.items.append((parsed[1], line))
+        return line
+
+    def recover(self, partial_path):
+        """Returns the (status_id, line) pairs of an interrupted run's `.partial` file."""
+        if not os.path.exists(partial_path):
+            return []
+        items = {}
+        with open(partial_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                try:
+                    key = line_key(line) if line else 0
+                except ValueError:
+                    # The last line may have been cut off by the crash
+                    continue
+                if key:
+                    items.setdefault(key, line)
+        if items:
+            print(f"[INFO] Recovered {len(items)} posts from an interrupted run ({partial_path}).")
+        return list(items.items())
+
+    def read_sizes(self, paths):
+        """Returns the line count of each shard, from the sizes file where it is still current."""
+        try:
+            with open(self.sizes_path, "r", encoding="utf-8") as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            recorded = {}
+        sizes = []
+        for path in paths:
+            entry = recorded.get(os.path.basename(path))
+            current = os.path.getsize(path) if os.path.exists(path) else 0
+            if entry and entry[0] == current:
+                sizes.append(entry[1])
+            else:
+                sizes.append(count_lines(path))
+        return sizes
+
+    def write_sizes(self, paths, sizes):
+        recorded = {
+            os.path.basename(path): [os.path.getsize(path), size]
+            for path, size in zip(paths, sizes)
+        }
+        with open(self.sizes_path, "w", encoding="utf-8") as f:
+            json.dump(recorded, f)
+
+    def write_sorted(self, items, merge):
+        """Writes (status_id, line) pairs, sorted by ID, to the output files."""
+        paths = shard_paths(self.final_path, self.shards)
+        if not merge:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        sizes = None
+        if self.shards == 1:
+            buckets = [items]
+        elif self.shard_by == "hash":
+            buckets = [[] for _ in paths]
+            for item in items:
+                buckets[hash_shard(item[0], self.shards)].append(item)
+        else:
+            # Posts already in a shard stay there; new ones go to the smallest shards
+            lasts = [key for key in map(last_key, paths) if key is not None]
+            known = set()
+            if items and lasts and items[0][0] <= max(lasts):
+                # Some posts may be in a shard already, so all of them are read
+                sizes = []
+                for path in paths:
+                    keys = [key for key, _ in read_keyed_lines(path)]
+                    known.update(keys)
+                    sizes.append(len(keys))
+            else:
+                # All posts are newer than the shards, as after an incremental run
+                sizes = self.read_sizes(paths)
+            buckets = [[] for _ in paths]
+            for item in items:
+                if item[0] in known:
+                    continue
+                smallest = min(range(len(paths)), key=lambda i: sizes[i])
+                buckets[smallest].append(item)
+                sizes[smallest] += 1
+
+        for path, bucket in zip(paths, buckets):
+            # Every shard file exists, even an empty one, so each downloader has a file to read
+            open(path, "a", encoding="utf-8").close()
+            merge_sorted(path, bucket)
+        if sizes is not None:
+            self.write_sizes(paths, sizes)
+
+    def close(self):
+        super().close()
+        # A recovered post may have been found again by this run
+        items = []
+        for item in sorted(self.items):
+            if not items or items[-1][0] != item[0]:
+                items.append(item)
+        self.write_sorted(items, self.merge)
+        os.remove(self.path)
@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import time
+import heapq
+import argparse
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from scraper import BrowserSession, parse_window_size, start_shared_browser
+from status_index import StatusIndex
+from status_store import parse_status_url
+from throttle import SessionPool
+from timeline_json import parse_media_types
+from url_files import post_record
+
+def read_watch_list(filepath, default_interval):
+    """Reads "username [interval_seconds]" lines. Returns {username: interval}."""
+    accounts = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            accounts[parts[0].lstrip('@')] = float(parts[1]) if len(parts) > 1 else default_interval
+    return accounts
+
+class WatchSchedule:
+    """Hands out accounts whose poll interval has passed.
+
+    An account is only rescheduled once its poll is done, so it is never
+    polled by two workers at the same time.
+    """
+
+    def __init__(self, intervals):
+        self.intervals = intervals
+        self.cond = threading.Condition()
+        # (due time, account), all due right away
+        self.heap = [(0.0, account) for account in intervals]
+        heapq.heapify(self.heap)
+        self.due = dict.fromkeys(intervals, 0.0)
+
+    def next(self, stop):
+        """Blocks until an account is due and returns it, or None once `stop` is set."""
+        with self.cond:
+            while not stop.is_set():
+                delay = 1.0
+                if self.heap:
+                    delay = self.heap[0][0] - time.time()
+                    if delay <= 0:
+                        return heapq.heappop(self.heap)[1]
+                # Wake up at least once a second to notice `stop`
+                self.cond.wait(min(delay, 1.0))
+            return None
+
+    def done(self, account):
+        with self.cond:
+            due = time.time() + self.intervals[account]
+            self.due[account] = due
+            heapq.heappush(self.heap, (due, account))
+            self.cond.notify()
+
+class JsonlSink:
+    """Appends one JSON record per line, flushed right away so readers can tail the file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        if path == "-":
+            # sys.stdout is redirected to stderr to keep log lines off the pipe
+            self.file = sys.__stdout__
+        else:
+            self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        with self.lock:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.path != "-":
+                self.file.close()
+
+class WatchState:
+    """Per-account poll results and the most recent new posts, for the status endpoint."""
+
+    def __init__(self, schedule, recent=200):
+        self.schedule = schedule
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.accounts = {
+            account: {"interval_s": interval, "polls": 0, "errors": 0, "new_total": 0,
+                      "last_poll": None, "last_poll_s": None, "last_new": 0, "last_status": None}
+            for account, interval in schedule.intervals.items()
+        }
+        self.recent = deque(maxlen=recent)
+
+    def add_post(self, record):
+        with self.lock:
+            self.recent.append(record)
+
+    def record_poll(self, account, seconds, new, status):
+        with self.lock:
+            info = self.accounts[account]
+            info["polls"] += 1
+            info["last_poll"] = time.time()
+            info["last_poll_s"] = round(seconds, 3)
+            info["last_new"] = new
+            info["new_total"] += new
+            info["last_status"] = status
+            if status == "error":
+                info["errors"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            accounts = {account: dict(info) for account, info in self.accounts.items()}
+        for account, info in accounts.items():
+            info["next_poll"] = self.schedule.due.get(account)
+        return {"started_at": self.started, "uptime_s": round(time.time() - self.started, 3), "accounts": accounts}
+
+    def recent_posts(self):
+        with self.lock:
+            return list(self.recent)
+
+class StatusHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split("?")[0].rstrip("/")
+        if path in ("", "/status"):
+            payload = self.state.snapshot()
+        elif path == "/recent":
+            payload = self.state.recent_posts()
+        else:
+            self.send_error(404)
+            return
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_status_server(state, port):
+    """Serves the watch state as JSON on localhost. Returns the server."""
+    handler = type("WatchStatusHandler", (StatusHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def poll_account(browser, index, account, sink, state, scan_options):
+    """Reads the top of one account's media tab and publishes the posts not indexed yet."""
+    new = 0
+
+    def on_url(url, media_type):
+        nonlocal new
+        new += 1
+        record = post_record(account, parse_status_url(url)[1], url, media_type)
+        sink.write(record)
+        state.add_post(record)
+
+    start = time.perf_counter()
+    try:
+        browser.scan(account, index=index, incremental=True, on_url=on_url, **scan_options)
+    except Exception:
+        state.record_poll(account, time.perf_counter() - start, new, "error")
+        raise
+    elapsed = time.perf_counter() - start
+    state.record_poll(account, elapsed, new, "throttled" if browser.throttled else "ok")
+    print(f"[INFO] Polled {account} in {elapsed:.2f}s: {new} new posts.")
+
+def watch(intervals, pool, jsonl_path, index_path, workers=1, status_port=8765,
+          driver_options=None, **scan_options):
+    """Polls the accounts until Ctrl+C, with `workers` browsers (or cdp tabs) kept open between polls."""
+    driver_options = dict(driver_options or {})
+    workers = max(1, min(workers, len(intervals)))
+    shared = start_shared_browser(driver_options, workers)
+    schedule = WatchSchedule(intervals)
+    state = WatchState(schedule)
+    sink = JsonlSink(jsonl_path)
+    stop = threading.Event()
+    server = None
+    if status_port:
+        server = start_status_server(state, status_port)
+        print(f"[INFO] Status at http://127.0.0.1:{server.server_address[1]}/status")
+
+    def worker(worker_id):
+        options = dict(driver_options)
+        if options.get("profile_dir") and shared is None:
+            options["profile_dir"] = os.path.join(options["profile_dir"], f"worker-{worker_id}")
+        browser = BrowserSession(pool, **options)
+        # SQLite connections cannot be shared between threads
+        index = StatusIndex(index_path)
+        try:
+            # Start the browser before the first poll is due
+            try:
+                browser.start()
+            except Exception as e:
+                print(f"[ERROR] [worker {worker_id}] Could not start the browser: {e}")
+            while True:
+                account = schedule.next(stop)
+                if account is None:
+                    break
+                try:
+                    poll_account(browser, index, account, sink, state, scan_options)
+                except Exception as e:
+                    print(f"[ERROR] [worker {worker_id}] {account} failed: {e}")
+                    # Start the next poll with a fresh browser
+                    browser.quit()
+                finally:
+                    schedule.done(account)
+        finally:
+            browser.quit()
+            index.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(i + 1,), daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        for t in threads:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping after the polls in progress...")
+        stop.set()
+        for t in threads:
+            t.join()
+    finally:
+        if server is not None:
+            server.shutdown()
+        if shared is not None:
+            shared.quit()
+        sink.close()
+
+def main():
+    if getattr(sys, 'frozen', False):
+        application_path = os.path.dirname(sys.executable)
+    else:
+        application_path = os.path.dirname(os.path.abspath(__file__))
+
+    parser = argparse.ArgumentParser(description="Watch X accounts and publish new media posts as they appear.")
+    parser.add_argument("usernames", nargs="*", metavar="username", help="The X username(s) (without @)")
+    parser.add_argument("-a", "--accounts", help='File with "username [interval_seconds]" lines')
+    parser.add_argument("-i", "--interval", type=float, default=300.0, help="Seconds between polls of an account (default: 300)")
+    parser.add_argument("-c", "--cookies", action="append", help="Path to cookies.txt. Repeat to rotate between sessions when rate limited")
+    parser.add_argument("-o", "--output", default="new_posts.jsonl", help="JSONL file new posts are appended to. Use - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Browsers kept open for polling (default: 1)")
+    parser.add_argument("--status-port", type=int, default=8765, help="Port of the local status endpoint, 0 to disable (default: 8765)")
+    parser.add_argument("--index", default=os.path.join(application_path, "status_index.db"), help="Path to the status index database")
+    parser.add_argument("--profile-dir", help="Chrome user-data directory to keep the login session between runs")
+    parser.add_argument("--driver-cache", default=os.path.join(application_path, "chromedriver_cache.json"), help="File caching the resolved chromedriver path")
+    parser.add_argument("--headless", action="store_true", help="Run Chrome without a visible window")
+    parser.add_argument("--window-size", type=parse_window_size, help="Browser window size as WIDTHxHEIGHT, e.g. 800x600")
+    parser.add_argument("--backend", choices=["selenium", "cdp"], default="selenium", help="Drive Chrome through chromedriver (selenium) or directly over the DevTools protocol (cdp, needs websockets)")
+    parser.add_argument("--media", default="video,gif,image", help="Comma-separated media types to publish: video, gif, image (default: all)")
+    parser.add_argument("--stop-after-known", type=int, default=3, help="Known posts in a row that end a poll (default: 3)")
+    parser.add_argument("--max-scrolls", type=int, default=3, help="Most scrolls per poll, e.g. for a new account (default: 3)")
+    args = parser.parse_args()
+
+    intervals = {u.lstrip('@'): args.interval for u in args.usernames}
+    if args.accounts:
+        intervals.update(read_watch_list(args.accounts, args.interval))
+    if not intervals:
+        parser.error("No username provided.")
+
+    cookie_paths = args.cookies or [os.path.join(application_path, "cookies.txt")]
+    for cookies_path in cookie_paths:
+        if not os.path.exists(cookies_path):
+            print(f"[ERROR] Cookie file not found at: {cookies_path}")
+            return
+
+    if args.output == "-":
+        # Keep stdout for records only
+        sys.stdout = sys.stderr
+    print(f"[INFO] Watching {len(intervals)} accounts with {args.workers} browser(s). Use Ctrl+C to stop.")
+    watch(
+        intervals,
+        SessionPool(cookie_paths),
+        args.output,
+        args.index,
+        workers=args.workers,
+        status_port=args.status_port,
+        driver_options=dict(
+            driver_cache=args.driver_cache,
+            profile_dir=args.profile_dir,
+            lean=True,
+            headless=args.headless,
+            window_size=args.window_size,
+            backend=args.backend,
+        ),
+        media_types=parse_media_types(args.media),
+        stop_after_known=args.stop_after_known,
+        max_scrolls=args.max_scrolls,
+        max_retries=1,
+    )
+
+if __name__ == "__main__":
+    main()